@@ -0,0 +1,396 @@
+"""Screening engine behind the dashboard and the headless screener.
+
+Nothing in here imports Streamlit: `screen` and `deep_dive` build the
+summary and deep-dive tables (see `universe`) for a watchlist, and the
+snapshot helpers let `screener.py` precompute them for the dashboard to load.
+"""
+import contextvars
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+import market_data
+import metrics
+import news
+import sentiment
+import universe
+from concurrency import map_completed, map_ordered
+
+SNAPSHOT_DIR = os.environ.get(
+    "SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "snapshots"),
+)
+SNAPSHOT_MAX_AGE = float(os.environ.get("SNAPSHOT_MAX_AGE", 15 * 60))  # seconds; a snapshot's own max_age file wins
+SNAPSHOT_AGE_FILE = "max_age"
+STREAM_FIRST_CHUNK = 10  # small enough that the first rows land within about a second
+_snapshot_memo = {}  # root -> (fresh snapshot files and their mtimes, merged tables)
+_snapshot_lock = threading.Lock()
+
+
+def is_valid_ticker(ticker):
+    return bool(re.match(r'^[A-Z0-9\-\.]+$', ticker))
+
+
+# 📐 Dividend-yield target price math
+def dividend_payout(dividends, low_date, days=365):
+    """Dividends paid in the `days` leading up to (and including) `low_date`."""
+    start = low_date - timedelta(days=days)
+    return dividends[(dividends.index >= start) & (dividends.index <= low_date)].sum()
+
+
+def target_price(current_price, dividend_yield, payout_yield):
+    """Price at which today's payout would yield what the stock yielded at its low."""
+    if not dividend_yield or not payout_yield:
+        return 0
+    return current_price * (dividend_yield / 100) / payout_yield
+
+
+def safe_zones(current_price, dividend_yield, payout_yield):
+    """Target prices at 90% and 80% of the historical payout yield."""
+    if not payout_yield:
+        return 0, 0
+    return (
+        target_price(current_price, dividend_yield, payout_yield * 0.9),
+        target_price(current_price, dividend_yield, payout_yield * 0.8),
+    )
+
+
+def yield_history(prices, dividends):
+    """Per-payment dividend yield against the last close on or before each pay date.
+
+    One `searchsorted` pass does the as-of join for the whole dividend series,
+    so payments landing on weekends or holidays use the prior close instead
+    of being dropped.
+    """
+    columns = ["Dividend", "Price", "Yield (%)"]
+    if prices.empty or dividends.empty:
+        return pd.DataFrame(columns=columns)
+
+    # Only the closes on pay dates are gathered, so `prices` can stay a float32 view of the mapped store.
+    pos = np.searchsorted(prices.index.to_numpy(), dividends.index.to_numpy(), side="right") - 1
+    valid = pos >= 0
+    price = np.where(valid, prices.to_numpy()[np.clip(pos, 0, None)].astype(float), np.nan)
+    amount = dividends.to_numpy(dtype=float)
+    valid &= price > 0
+
+    return pd.DataFrame(
+        {
+            "Dividend": amount[valid],
+            "Price": price[valid],
+            "Yield (%)": amount[valid] / price[valid] * 100,
+        },
+        index=dividends.index[valid],
+    )
+
+
+# 🧮 Per-ticker rows
+def get_eps_metrics(stock):
+    info = stock.info
+    eps_data = {}
+    try:
+        eps_data["Trailing EPS"] = round(info.get("trailingEps", 0), 2)
+        eps_data["Forward EPS"] = round(info.get("forwardEps", 0), 2)
+        eps_data["PE Ratio"] = round(info.get("trailingPE", 0), 2)
+        eps_data["PEG Ratio"] = round(info.get("pegRatio", 0), 2)
+    except:
+        pass
+    return eps_data
+
+
+def get_sentiment(ticker, headlines):
+    try:
+        with metrics.span("compute.sentiment"):
+            verdict = sentiment.default_store().assess(ticker, headlines)
+        return verdict["label"], verdict["trend"]
+    except:
+        return "Unknown", "N/A"
+
+
+def analyze_ticker(ticker, messages, headlines=None):
+    ticker = ticker.strip()
+    if not is_valid_ticker(ticker):
+        messages.append(("warning", f"⚠️ Invalid ticker: {ticker}"))
+        return None
+
+    try:
+        stock = market_data.Ticker(ticker)
+        info = stock.info
+        if not info or "currentPrice" not in info:
+            messages.append(("warning", f"⚠️ No data for: {ticker}"))
+            return None
+
+        name = info.get("shortName", "N/A")
+        sector = info.get("sector", "N/A")
+        industry = info.get("industry", "N/A")
+        current_price = info.get("currentPrice", 0)
+        dividend_yield = info.get("dividendYield", 0) or 0
+        high_52 = info.get("fiftyTwoWeekHigh", 0)
+        low_52 = info.get("fiftyTwoWeekLow", 0)
+        price_zone = ((current_price - low_52) / (high_52 - low_52)) * 100 if high_52 != low_52 else 0
+
+        closes = stock.closes(period="5y")
+        if closes.empty:
+            messages.append(("warning", f"⚠️ No historical data for: {ticker}"))
+            return None
+
+        low_5y_price = float(closes.min())
+        low_5y_date = closes.idxmin()
+        payout_5y = dividend_payout(stock.dividend_series(), low_5y_date)
+        yield_5y = (payout_5y / low_5y_price) if low_5y_price else 0
+
+        target_actual = target_price(current_price, dividend_yield, yield_5y)
+        sentiment_label, sentiment_trend = get_sentiment(ticker, headlines)
+
+        result = {
+            "Ticker": ticker,
+            "Name": name,
+            "Sector": sector,
+            "Industry": industry,
+            "Current Price": round(current_price, 2),
+            "Price Zone (%)": round(price_zone, 2),
+            "Dividend Yield (%)": round(dividend_yield, 2),
+            "52W High": round(high_52, 2),
+            "52W Low": round(low_52, 2),
+            "5Y Low Date": low_5y_date.date(),
+            "5Y Low Price": round(low_5y_price, 2),
+            "5Y Dividend Payout": round(payout_5y, 2),
+            "5Y Dividend Yield (%)": round(yield_5y, 2),
+            "Target Price (Actual)": round(target_actual, 2),
+            "Sentiment": sentiment_label,
+            "Sentiment Trend": sentiment_trend,
+        }
+
+        result.update(get_eps_metrics(stock))
+        return result
+
+    except Exception as e:
+        messages.append(("error", f"❌ Error analyzing {ticker}: {e}"))
+        return None
+
+
+def get_yield_analysis(ticker, messages, histories=None):
+    try:
+        stock = market_data.Ticker(ticker)
+        info = stock.info
+        current_price = info.get("currentPrice", 0)
+        dividend_yield = info.get("dividendYield", 0) or 0
+        current_payout = current_price * (dividend_yield / 100)
+
+        # Historical dividend yield extremes, over the mapped close/dividend store (sorted, tz-naive)
+        dividends = stock.dividend_series()
+        prices = stock.closes()
+
+        if dividends.empty or prices.empty:
+            return None
+
+        yields = yield_history(prices, dividends)
+        if yields.empty:
+            return None
+        if histories is not None:
+            histories[ticker] = yields["Yield (%)"]
+
+        high = yields["Yield (%)"].idxmax()
+        low = yields["Yield (%)"].idxmin()
+        high_yield = (high, yields.at[high, "Yield (%)"], yields.at[high, "Price"])
+        low_yield = (low, yields.at[low, "Yield (%)"], yields.at[low, "Price"])
+
+        debt_ratio = info.get("debtToEquity", None)
+
+        # Raw numbers; styling.DEEP_DIVE_FORMATS formats them for display
+        return {
+            "Ticker": ticker,
+            "Name": info.get("shortName", "N/A"),
+            "Current Price": current_price,
+            "Current Dividend Yield (%)": dividend_yield,
+            "Current Dividend Payout": current_payout,
+            "Debt Servicing Ratio": debt_ratio or None,
+            "High Yield (%)": high_yield[1],
+            "High Yield Date": high_yield[0],
+            "High Yield Price": high_yield[2],
+            "Low Yield (%)": low_yield[1],
+            "Low Yield Date": low_yield[0],
+            "Low Yield Price": low_yield[2],
+            "High - Current Yield (%)": high_yield[1] - dividend_yield,
+            "Low - Current Yield (%)": low_yield[1] - dividend_yield,
+        }
+    except Exception as e:
+        messages.append(("error", f"❌ Error in yield analysis for {ticker}: {e}"))
+        return None
+
+
+def fill_yield_histories(tickers, histories):
+    """Per-payment yield series for `tickers` missing from `histories` (e.g. rows served from a snapshot).
+
+    Read from the mapped close/dividend store, so warm tickers cost no fetch.
+    """
+    for ticker in tickers:
+        if ticker in histories:
+            continue
+        try:
+            stock = market_data.Ticker(ticker)
+            yields = yield_history(stock.closes(), stock.dividend_series())
+        except Exception:
+            continue
+        if not yields.empty:
+            histories[ticker] = yields["Yield (%)"]
+    return histories
+
+
+# 📋 Whole-watchlist passes
+def _prefetch(tickers):
+    """Bulk-refresh prices for the valid tickers while fetching their headlines; returns the headlines."""
+    valid = [t for t in tickers if is_valid_ticker(t)]
+
+    def fetch_headlines():
+        with metrics.span("fetch.headlines"):
+            return news.default_fetcher().fetch_many(valid)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        headlines_job = pool.submit(contextvars.copy_context().run, fetch_headlines)
+        try:
+            with metrics.span("fetch.prefetch"):
+                market_data.default_cache().prefetch(valid)
+        except Exception:
+            pass  # the per-ticker reads still fill any gaps
+        return headlines_job.result()
+
+
+def screen(tickers, messages, max_workers=None):
+    """Summary table (`universe.SUMMARY_SCHEMA`) for a watchlist, in input order.
+
+    Prices for every valid ticker are refreshed with one bulk download while
+    Finviz headlines are fetched alongside; the per-ticker analysis then
+    reads both from cache.
+    """
+    headlines = _prefetch(tickers)
+    with metrics.span("compute.summary_rows"):
+        results = map_ordered(
+            lambda t: analyze_ticker(t, messages, headlines.get(t)), tickers, max_workers=max_workers, log=messages
+        )
+        return universe.from_rows(results, universe.SUMMARY_SCHEMA)
+
+
+def screen_stream(tickers, messages, histories=None, deep=True, max_workers=None):
+    """Yield (ticker, summary_row, deep_row) as each ticker finishes, in completion order.
+
+    Tickers go through in chunks -- a small first one so the first rows land
+    quickly, then DOWNLOAD_BATCH at a time -- and the next chunk's prices and
+    headlines are fetched while the current one is analysed. Rows are None
+    where `screen` / `deep_dive` would have dropped the ticker.
+    """
+    tickers = list(tickers)
+    step = market_data.DOWNLOAD_BATCH
+    chunks = [tickers[:STREAM_FIRST_CHUNK]]
+    chunks += [tickers[i:i + step] for i in range(STREAM_FIRST_CHUNK, len(tickers), step)]
+    chunks = [chunk for chunk in chunks if chunk]
+    if not chunks:
+        return
+
+    def both(ticker, headlines):
+        row = analyze_ticker(ticker, messages, headlines.get(ticker))
+        return row, get_yield_analysis(ticker, messages, histories) if deep else None
+
+    with ThreadPoolExecutor(max_workers=1) as ahead:
+        pending = ahead.submit(contextvars.copy_context().run, _prefetch, chunks[0])
+        for i, chunk in enumerate(chunks):
+            headlines = pending.result()
+            if i + 1 < len(chunks):
+                pending = ahead.submit(contextvars.copy_context().run, _prefetch, chunks[i + 1])
+            finished = map_completed(lambda t: both(t, headlines), chunk, max_workers=max_workers, log=messages)
+            for index, (row, deep_row) in finished:
+                yield chunk[index], row, deep_row
+
+
+def deep_dive(tickers, messages, histories=None, max_workers=None):
+    """Deep-dive table (`universe.DEEP_DIVE_SCHEMA`) for a watchlist, in input order."""
+    with metrics.span("compute.deep_dive"):
+        results = map_ordered(
+            lambda t: get_yield_analysis(t, messages, histories), tickers, max_workers=max_workers, log=messages
+        )
+        return universe.from_rows(results, universe.DEEP_DIVE_SCHEMA)
+
+
+# 💾 Precomputed snapshots
+def write_snapshot(summary, deep, out_dir=SNAPSHOT_DIR, max_age=None):
+    """Write both tables; `max_age` (seconds) keeps this snapshot fresh for that long instead of the default."""
+    os.makedirs(out_dir, exist_ok=True)
+    age_path = os.path.join(out_dir, SNAPSHOT_AGE_FILE)
+    if max_age is None:
+        if os.path.exists(age_path):
+            os.remove(age_path)
+    else:
+        with open(age_path, "w", encoding="utf-8") as fh:
+            fh.write(f"{max_age}\n")
+    for name, frame in (("summary", summary), ("deep_dive", deep)):
+        path = os.path.join(out_dir, f"{name}.parquet")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+
+def _max_age(out_dir, default):
+    try:
+        with open(os.path.join(out_dir, SNAPSHOT_AGE_FILE), encoding="utf-8") as fh:
+            return float(fh.read())
+    except (OSError, ValueError):
+        return default
+
+
+def load_snapshot(out_dir=SNAPSHOT_DIR, max_age=SNAPSHOT_MAX_AGE):
+    """(summary, deep_dive) tables from `out_dir`, or None if missing, stale or in an old layout."""
+    paths = [os.path.join(out_dir, f"{name}.parquet") for name in ("summary", "deep_dive")]
+    try:
+        if time.time() - min(os.path.getmtime(p) for p in paths) > _max_age(out_dir, max_age):
+            return None
+        return (
+            universe.conform(pd.read_parquet(paths[0]), universe.SUMMARY_SCHEMA),
+            universe.conform(pd.read_parquet(paths[1]), universe.DEEP_DIVE_SCHEMA),
+        )
+    except (OSError, ValueError):
+        return None
+
+
+def _fresh_snapshots(root, max_age):
+    """(dir, summary mtime, deep-dive mtime) for every fresh snapshot under `root`."""
+    fresh = []
+    now = time.time()
+    for dirpath, _, filenames in os.walk(root):
+        if "summary.parquet" not in filenames:
+            continue
+        try:
+            stamps = [os.path.getmtime(os.path.join(dirpath, f"{n}.parquet")) for n in ("summary", "deep_dive")]
+        except OSError:
+            continue
+        if now - min(stamps) <= _max_age(dirpath, max_age):
+            fresh.append((dirpath, *stamps))
+    return tuple(sorted(fresh))
+
+
+def load_snapshots(root=SNAPSHOT_DIR, max_age=SNAPSHOT_MAX_AGE):
+    """Every fresh snapshot under `root` (screener output and warm presets) merged, or None.
+
+    Only the files are stat'ed on each call; the Parquet reads and casts are
+    redone only when the set of fresh snapshots or one of their mtimes changes.
+    The tables are shared between callers, so treat them as read-only.
+    """
+    fresh = _fresh_snapshots(root, max_age)
+    with _snapshot_lock:
+        memo = _snapshot_memo.get(root)
+        if memo and memo[0] == fresh:
+            return memo[1]
+    found = [snapshot for dirpath, *_ in fresh if (snapshot := load_snapshot(dirpath, max_age))]
+    merged = None
+    if found:
+        merged = tuple(
+            universe.conform(pd.concat([s[i] for s in found], ignore_index=True), schema)
+            for i, schema in enumerate((universe.SUMMARY_SCHEMA, universe.DEEP_DIVE_SCHEMA))
+        )
+    with _snapshot_lock:
+        _snapshot_memo[root] = (fresh, merged)
+    return merged
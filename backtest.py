@@ -0,0 +1,217 @@
+"""Historical hit rates for the dividend-yield target-price signal.
+
+The chart (like `backup.py` before it) calls a ticker a buy when its price
+is at or below the price at which today's trailing dividends would yield
+what the stock yielded at its N-year low, with the 90% / 80% safe zones
+above that. Here the same rule is evaluated on every trading day of every
+ticker at once, over a tickers x calendar-days close panel (NaN where a
+ticker did not trade), so windows are the chart's 365 * N days whatever
+mix of exchange calendars the watchlist has:
+
+* the trailing N-year low and the day it came from use van Herk/Gil-Werman
+  block minima (one prefix and one suffix running-min pass, no date loop);
+* trailing 366-day dividends are a difference of cumulative sums;
+* forward returns are shifted slices of the closes. The stored closes are
+  dividend-adjusted (`auto_adjust=True`), so they already are total returns.
+
+Tickers are processed in chunks, so memory stays bounded however large
+the universe is.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import market_data
+from concurrency import map_ordered
+from targets import PAYOUT_DAYS, ZONE_LIMITS, ZONES
+
+YEAR_DAYS = 365  # calendar days per year in the low window, as on the chart
+HORIZONS = {"3M": 91, "6M": 182, "1Y": 365}  # forward-return horizons, in calendar days
+HISTORY_YEARS = 20
+COLUMN_CHUNK = 256
+BACKTEST_WORKERS = min(4, os.cpu_count() or 1)  # each worker holds one chunk's panels
+_UNITS_PER_DAY = {"s": 86_400, "ms": 86_400 * 10 ** 3, "us": 86_400 * 10 ** 6, "ns": 86_400 * 10 ** 9}
+
+
+def _day_numbers(index):
+    # Stored dates are naive midnights, so whole days are an integer division away.
+    return index.asi8 // _UNITS_PER_DAY[index.unit]
+
+
+def _window_low(values, window):
+    """Min over the last `window` days (inclusive) at every day, and the day it came from (earliest on ties).
+
+    `values` is tickers x days; days with fewer than `window` days behind them
+    get +inf. Each close is packed with its day number into one int64 (float
+    bits high, day low). Non-negative float bits sort like the values, so a
+    plain running minimum over the keys carries the low's day along with it.
+    """
+    cols, rows = values.shape
+    span = -(-rows // window) * window
+    padded = np.full((cols, span), np.inf, dtype=np.float32)
+    padded[:, :rows] = values
+    padded[np.isnan(padded)] = np.inf
+    np.maximum(padded, 0, out=padded)
+    padded += 0  # -0.0 -> 0.0, whose sign bit would sort it first
+    keys = (padded.view(np.int32).astype(np.int64) << 32) | np.arange(span)
+    b = keys.reshape(cols, -1, window)
+    pre = np.minimum.accumulate(b, axis=2).reshape(cols, span)
+    suf = np.minimum.accumulate(b[..., ::-1], axis=2)[..., ::-1].reshape(cols, span)
+
+    # A window spans at most two blocks: the suffix of the first and the prefix of the second.
+    best = np.full((cols, rows), np.int64(np.float32(np.inf).view(np.int32)) << 32)
+    if rows >= window:
+        np.minimum(suf[:, :rows - window + 1], pre[:, window - 1:rows], out=best[:, window - 1:])
+    return (best >> 32).astype(np.int32).view(np.float32), (best & 0xFFFFFFFF).astype(np.int32)
+
+
+def _grid(closes):
+    """Every calendar day from the first close to the last (day numbers) and a day -> column lookup."""
+    lo = min(_day_numbers(s.index[:1])[0] for s in closes.values())
+    hi = max(_day_numbers(s.index[-1:])[0] for s in closes.values())
+    columns = np.arange(hi - lo + 1)
+    return lo, columns + lo, columns
+
+
+def _chunk_panels(closes, dividends, tickers, lo, days, asof):
+    """Close (NaN off-listing) and paid-dividend float32 panels, tickers x days, for a few tickers."""
+    prices = np.full((len(tickers), len(days)), np.nan, dtype=np.float32)
+    paid = np.zeros((len(tickers), len(days)), dtype=np.float32)
+    for row, ticker in enumerate(tickers):
+        series = closes[ticker]
+        prices[row, asof[_day_numbers(series.index) - lo]] = series.to_numpy()
+        payments = dividends.get(ticker)
+        if payments is None or payments.empty:
+            continue
+        day = _day_numbers(payments.index) - lo
+        keep = day >= 0
+        np.add.at(paid[row], asof[np.clip(day[keep], None, len(asof) - 1)], payments.to_numpy(dtype=np.float32)[keep])
+    return prices, paid
+
+
+def _zones(prices, paid, days, window):
+    """Zone code per cell (-1 where the rule has no reading)."""
+    tickers, rows = prices.shape
+    low, low_row = _window_low(prices, window)
+    cum = np.zeros((tickers, rows + 1), dtype=np.float32)
+    np.cumsum(paid, axis=1, out=cum[:, 1:])
+    lag = np.searchsorted(days, days - PAYOUT_DAYS, side="left")
+    trailing = cum[:, 1:] - cum[:, lag]
+    payout_at_low = np.take_along_axis(trailing, np.clip(low_row, 0, rows - 1), axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # price / target, where target = trailing payout / (payout at the low / low)
+        ratio = prices * payout_at_low / (low * trailing)
+    listed = np.argmax(~np.isnan(prices), axis=1)
+    full_window = (np.arange(rows) - window + 1) >= listed[:, None]  # no lows from a partial history
+    ok = full_window & np.isfinite(low) & np.isfinite(prices) & (payout_at_low > 0) & (trailing > 0)
+    zone = np.zeros(ratio.shape, dtype=np.int8)
+    for limit in ZONE_LIMITS:
+        zone += ratio > limit
+    zone[~ok] = -1
+    return zone
+
+
+def _last_close(prices):
+    """Each cell's latest close on or before that day, NaN before listing and after the last close."""
+    cols = np.arange(prices.shape[1])
+    traded = ~np.isnan(prices)
+    at = np.maximum.accumulate(np.where(traded, cols, 0), axis=1)
+    last = np.take_along_axis(prices, at, axis=1)
+    last[cols > (prices.shape[1] - 1 - np.argmax(traded[:, ::-1], axis=1))[:, None]] = np.nan
+    return last
+
+
+def _forward_returns(prices, exits, steps):
+    """Adjusted-close return from each trading day to the close `steps` days later, NaN past the data."""
+    out = np.full(prices.shape, np.nan, dtype=np.float32)
+    if steps < prices.shape[1]:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[:, :-steps] = exits[:, steps:] / prices[:, :-steps] - 1
+    return out
+
+
+def _chunk_stats(closes, dividends, names, grid, window, horizons):
+    """Per-zone (signals, hits, summed return) per horizon, and the per-ticker rows, for a few tickers."""
+    lo, days, asof = grid
+    prices, paid = _chunk_panels(closes, dividends, names, lo, days, asof)
+    zone = _zones(prices, paid, days, window)
+    exits = _last_close(prices)
+    n_zones = len(ZONES)
+    last = list(horizons)[-1]
+    # Bins are zone * 2 + hit; cells without a reading (or a future) land in a spare last pair
+    # that is dropped, so nothing has to be gathered out and NaN returns never reach a kept bin.
+    unread = 2 * n_zones
+    base = np.where(zone >= 0, zone, n_zones).astype(np.intp) * 2
+    stats = {}
+    for label, steps in horizons.items():
+        ret = _forward_returns(prices, exits, steps)
+        codes = base + (ret > 0)
+        codes[np.isnan(ret)] = unread
+        codes, ret = codes.ravel(), ret.ravel()
+        counts = np.bincount(codes, minlength=unread + 2).reshape(-1, 2)[:n_zones]
+        summed = np.bincount(codes, weights=ret, minlength=unread + 2).reshape(-1, 2)[:n_zones].sum(axis=1)
+        stats[label] = np.stack([counts.sum(axis=1), counts[:, 1], summed])
+        if label == last:
+            codes, ret = codes.reshape(zone.shape), ret.reshape(zone.shape)
+            buys = codes < 2
+            buy_days = buys.sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                buy_hit = (codes == 1).sum(axis=1) / buy_days * 100
+                buy_ret = np.where(buys, ret, 0).sum(axis=1, dtype=float) / buy_days * 100
+
+    read = zone >= 0
+    current = zone[np.arange(len(names)), len(days) - 1 - np.argmax(read[:, ::-1], axis=1)]
+    rows = pd.DataFrame({
+        "Ticker": names,
+        "Signal Days": read.sum(axis=1),
+        "Buy Days": (zone == 0).sum(axis=1),
+        f"Buy Hit Rate {last} (%)": buy_hit,
+        f"Buy Avg Return {last} (%)": buy_ret,
+        "Current Zone": [ZONES[z] if z >= 0 else None for z in current],
+    })
+    return stats, rows
+
+
+def backtest(closes, dividends, years=5, horizons=None, chunk=COLUMN_CHUNK, max_workers=None):
+    """Zone summary and per-ticker table for the target-price rule on every date of every ticker.
+
+    `closes` / `dividends` map ticker -> Series. The summary has one row per
+    (zone, horizon) plus an "All" row for the unconditional base rate.
+    Column chunks run on a small thread pool (NumPy releases the GIL).
+    """
+    horizons = horizons or HORIZONS
+    closes = {t: s for t, s in closes.items() if s is not None and len(s)}
+    if not closes:
+        return pd.DataFrame(), pd.DataFrame()
+    grid = _grid(closes)
+    tickers = list(closes)
+    chunks = [tickers[i:i + chunk] for i in range(0, len(tickers), chunk)]
+    results = map_ordered(
+        lambda names: _chunk_stats(closes, dividends, names, grid, years * YEAR_DAYS, horizons),
+        chunks, max_workers=BACKTEST_WORKERS if max_workers is None else max_workers,
+    )
+
+    records = []
+    for label in horizons:
+        signals, hits, summed = sum(stats[label] for stats, _ in results)
+        counts = np.append(signals, signals.sum())
+        with np.errstate(divide="ignore", invalid="ignore"):
+            hit_rate = np.append(hits, hits.sum()) / counts * 100
+            avg_ret = np.append(summed, summed.sum()) / counts * 100
+        for i, zone_name in enumerate(ZONES + ("All",)):
+            records.append({"Zone": zone_name, "Horizon": label, "Signals": int(counts[i]),
+                            "Hit Rate (%)": hit_rate[i], "Avg Return (%)": avg_ret[i]})
+    return pd.DataFrame(records), pd.concat([rows for _, rows in results], ignore_index=True)
+
+
+def load_backtest(tickers, years=5, history_years=HISTORY_YEARS):
+    """`backtest` over up to `history_years` of cached closes and dividends for `tickers`."""
+    start = pd.Timestamp.today().normalize() - pd.DateOffset(years=history_years)
+    closes, dividends = {}, {}
+    for ticker in dict.fromkeys(tickers):
+        stock = market_data.Ticker(ticker)
+        closes[ticker] = stock.closes(start=start)
+        dividends[ticker] = stock.dividend_series(start=start)
+    return backtest(closes, dividends, years=years)
@@ -0,0 +1 @@
+"""Offline benchmark harness for a dashboard rerun (`python -m bench`)."""
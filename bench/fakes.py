@@ -0,0 +1,134 @@
+"""Local stand-ins for yfinance and the Finviz quote page, backed by fixtures.
+
+Any ticker maps onto one of the recorded fixtures (fixture tickers map to
+themselves), so a watchlist of any size can be served without a network.
+"""
+import http.server
+import json
+import os
+import threading
+import zlib
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from bench.record import FIXTURE_DIR
+
+
+class FixtureSet:
+    def __init__(self, root=FIXTURE_DIR):
+        self.root = root
+        self.keys = sorted(
+            name for name in os.listdir(root) if os.path.isfile(os.path.join(root, name, "info.json"))
+        )
+        if not self.keys:
+            raise RuntimeError(f"no fixtures in {root}; run `python -m bench.record --synthetic`")
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self.calls = {"info": 0, "history": 0, "dividends": 0, "download": 0, "finviz": 0}
+
+    def watchlist(self, size):
+        """Fixture tickers first, then generated SGX/US-style symbols."""
+        names = list(self.keys)
+        i = 0
+        while len(names) < size:
+            names.append(f"BX{i:04d}.SI" if i % 2 else f"BX{i:04d}")
+            i += 1
+        return names[:size]
+
+    def key_for(self, ticker):
+        ticker = ticker.upper()
+        if ticker in self.keys:
+            return ticker
+        return self.keys[zlib.crc32(ticker.encode()) % len(self.keys)]
+
+    def load(self, ticker):
+        key = self.key_for(ticker)
+        with self._lock:
+            if key not in self._loaded:
+                base = os.path.join(self.root, key)
+                with open(os.path.join(base, "info.json"), encoding="utf-8") as fh:
+                    info = json.load(fh)
+                hist = pd.read_parquet(os.path.join(base, "history.parquet")).astype("float64")
+                with open(os.path.join(base, "finviz.html"), "rb") as fh:
+                    html = fh.read()
+                self._loaded[key] = (info, hist, html)
+            return self._loaded[key]
+
+    def count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    # 📈 yfinance surface
+    def yfinance(self):
+        fixtures = self
+
+        class Ticker:
+            def __init__(self, ticker):
+                self.ticker = ticker
+
+            @property
+            def info(self):
+                fixtures.count("info")
+                return dict(fixtures.load(self.ticker)[0], shortName=self.ticker)
+
+            def history(self, period="1mo", start=None, end=None, **kwargs):
+                fixtures.count("history")
+                hist = fixtures.load(self.ticker)[1]
+                if start is not None:
+                    hist = hist[hist.index >= pd.Timestamp(start).tz_localize(hist.index.tz)]
+                return hist.copy()
+
+            @property
+            def dividends(self):
+                fixtures.count("dividends")
+                divs = fixtures.load(self.ticker)[1]["Dividends"]
+                return divs[divs > 0].copy()
+
+        def download(tickers, start=None, period=None, **kwargs):
+            fixtures.count("download")
+            frames = {}
+            for ticker in dict.fromkeys(t.upper() for t in tickers):
+                hist = fixtures.load(ticker)[1]
+                if start is not None:
+                    hist = hist[hist.index >= pd.Timestamp(start).tz_localize(hist.index.tz)]
+                frames[ticker] = hist.tz_localize(None)
+            index = None
+            for frame in frames.values():
+                index = frame.index if index is None else index.union(frame.index)
+            return pd.concat(
+                [frame.reindex(index) for frame in frames.values()], axis=1, keys=list(frames), names=["Ticker", "Price"]
+            )
+
+        return SimpleNamespace(Ticker=Ticker, download=download)
+
+    # 📰 Finviz surface
+    def serve_finviz(self):
+        """Start a local HTTP server for quote pages; returns (base_url, server)."""
+        fixtures = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                fixtures.count("finviz")
+                ticker = parse_qs(urlparse(self.path).query).get("t", [""])[0]
+                html = fixtures.load(ticker)[2]
+                etag = f'"{fixtures.key_for(ticker)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(html)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(html)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{server.server_port}/quote.ashx", server
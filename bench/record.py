@@ -0,0 +1,126 @@
+"""Record benchmark fixtures.
+
+    python -m bench.record D05.SI O39.SI C38U.SI KO    # live: yfinance + Finviz
+    python -m bench.record --synthetic                 # deterministic, no network
+
+Each fixture is a directory holding `info.json`, `history.parquet` (max daily
+history with actions, exchange-local timestamps) and `finviz.html`.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SYNTHETIC = {
+    # ticker: (name, sector, industry, timezone, start price, dividends per year, yield %)
+    "D05.SI": ("DBS Group Holdings", "Financial Services", "Banks - Regional", "Asia/Singapore", 12.0, 4, 5.6),
+    "C38U.SI": ("CapitaLand Integrated Commercial Trust", "Real Estate", "REIT - Retail", "Asia/Singapore", 1.9, 2, 5.2),
+    "S68.SI": ("Singapore Exchange", "Financial Services", "Financial Data & Stock Exchanges", "Asia/Singapore", 6.5, 4, 3.1),
+    "KO": ("The Coca-Cola Company", "Consumer Defensive", "Beverages - Non-Alcoholic", "America/New_York", 22.0, 4, 2.9),
+}
+
+HEADLINES = [
+    "{name} posts record quarterly profit, beats estimates",
+    "{name} raises dividend as earnings climb",
+    "Analysts upgrade {name} on strong loan growth",
+    "{name} shares slip after cautious outlook",
+    "Regulator fines {name} over compliance lapses",
+    "{name} announces share buyback programme",
+    "{name} faces margin pressure as rates fall",
+    "What to expect from {name} earnings next week",
+    "{name} CEO says demand remains resilient",
+    "Investors weigh {name} valuation after rally",
+    "{name} cuts guidance amid weak consumer spending",
+    "{name} wins approval for regional expansion",
+]
+
+
+def finviz_page(headlines):
+    rows = "\n".join(
+        f'<tr><td width="130">Jan-{i + 1:02d}-26 09:{i:02d}AM</td>'
+        f'<td><div class="news-link-container"><a class="tab-link-news" href="#">{h}</a></div></td></tr>'
+        for i, h in enumerate(headlines)
+    )
+    return f'<html><body><table id="news-table" class="fullview-news-outer">\n{rows}\n</table></body></html>'
+
+
+def synthetic_fixture(ticker, seed):
+    name, sector, industry, tz, start_price, per_year, yield_pct = SYNTHETIC[ticker]
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2004-01-02", "2026-09-30")
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0002, 0.013, len(idx))))
+    spread = np.abs(rng.normal(0, 0.008, len(idx)))
+    hist = pd.DataFrame(
+        {
+            "Open": close * (1 + rng.normal(0, 0.004, len(idx))),
+            "High": close * (1 + spread),
+            "Low": close * (1 - spread),
+            "Close": close,
+            "Volume": rng.integers(1e5, 5e6, len(idx)),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        },
+        index=idx.tz_localize(tz),
+    )
+    pay_rows = np.arange(40, len(idx), 252 // per_year)
+    hist.iloc[pay_rows, hist.columns.get_loc("Dividends")] = close[pay_rows] * yield_pct / 100 / per_year
+    hist.index.name = "Date"
+
+    last = float(close[-1])
+    info = {
+        "shortName": name, "sector": sector, "industry": industry, "exchangeTimezoneName": tz,
+        "currentPrice": round(last, 2), "dividendYield": yield_pct,
+        "fiftyTwoWeekHigh": round(float(close[-252:].max()), 2), "fiftyTwoWeekLow": round(float(close[-252:].min()), 2),
+        "trailingEps": 1.42, "forwardEps": 1.55, "trailingPE": round(last / 1.42, 2), "pegRatio": 1.8,
+        "debtToEquity": 61.5,
+    }
+    picks = rng.choice(len(HEADLINES), size=10, replace=False)
+    return info, hist, finviz_page([HEADLINES[i].format(name=name.split()[0]) for i in picks])
+
+
+def live_fixture(ticker):
+    import requests
+    import yfinance as yf
+
+    stock = yf.Ticker(ticker)
+    resp = requests.get("https://finviz.com/quote.ashx", params={"t": ticker},
+                        headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+    return stock.info, stock.history(period="max"), resp.text
+
+
+def save_fixture(ticker, info, hist, html, root=FIXTURE_DIR):
+    # float32 halves the checked-in size; fakes widen back to float64 on load.
+    hist = hist.astype({col: "float32" for col in ("Open", "High", "Low", "Close", "Dividends", "Stock Splits")
+                        if col in hist.columns})
+    out = os.path.join(root, ticker.upper())
+    os.makedirs(out, exist_ok=True)
+    with open(os.path.join(out, "info.json"), "w", encoding="utf-8") as fh:
+        json.dump(info, fh, indent=1, default=str)
+    hist.to_parquet(os.path.join(out, "history.parquet"))
+    with open(os.path.join(out, "finviz.html"), "w", encoding="utf-8") as fh:
+        fh.write(html)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record benchmark fixtures.")
+    parser.add_argument("tickers", nargs="*", help="tickers to record live")
+    parser.add_argument("--synthetic", action="store_true", help="write the deterministic offline fixture set")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        for seed, ticker in enumerate(SYNTHETIC):
+            save_fixture(ticker, *synthetic_fixture(ticker, seed))
+            print(f"wrote synthetic fixture {ticker}")
+    for ticker in args.tickers:
+        save_fixture(ticker, *live_fixture(ticker))
+        print(f"recorded {ticker}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
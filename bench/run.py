@@ -0,0 +1,252 @@
+"""Time a dashboard rerun stage by stage against local fixtures.
+
+    python -m bench                          # 5, 23, 500 and 5000 tickers
+    python -m bench --sizes 5,23             # quicker
+    python -m bench --save-baseline --runs 3 # store the median of three runs as the new baseline
+
+Each watchlist size gets a fresh cache. Per-ticker stages report latency
+percentiles over the tickers; warm whole-watchlist stages are timed
+WHOLE_REPEATS times. Peak memory (tracemalloc) is taken on a warm repeat of
+each stage so it does not skew the timings. Results are compared with
+bench/baselines.json and the run exits non-zero if any stage's latency or
+peak grows past the tolerance, which is relative to that stage's own
+baseline. Latency is the p95 where a stage has MIN_P95_SAMPLES samples and
+the median of its repeats otherwise; NOISE_FLOOR only keeps sub-millisecond
+stages from flapping on timer jitter. With --runs N the whole bench is run N
+times and each stage keeps the median of its N summaries.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_SIZES = (5, 23, 500, 5000)
+CHART_SAMPLES = 20
+STYLER_REPEATS = 5
+WHOLE_REPEATS = 3
+MIN_P95_SAMPLES = 20  # fewer samples than this and the p95 is just the slowest one
+# Smallest growth counted, so a 0.3 ms stage doubling to 0.6 ms is jitter; a per-ticker stage at 5 ms still fails at ~7.5 ms
+NOISE_FLOOR = {"time_ms": 1.0, "peak_mb": 0.05}
+
+
+def _isolate(workdir):
+    # Every cache the app touches is pointed at a scratch directory before
+    # the app modules are imported, so a run never reads or dirties .cache/.
+    os.environ["MARKET_CACHE_DIR"] = os.path.join(workdir, "market_data")
+    os.environ["SENTIMENT_DB"] = os.path.join(workdir, "sentiment.sqlite")
+    os.environ["SNAPSHOT_DIR"] = os.path.join(workdir, "snapshots")
+    os.environ["WARMUP_ENABLED"] = "0"
+    os.environ["YAHOO_RATE"] = "0"  # fixtures are local, so don't time the upstream limiter
+
+
+def _summary(samples, peak_bytes=None):
+    ms = np.asarray(samples, dtype=float) * 1000
+    out = {
+        "n": len(ms),
+        "total_ms": round(float(ms.sum()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+    if peak_bytes is not None:
+        out["peak_mb"] = round(peak_bytes / 2 ** 20, 2)
+    return out
+
+
+def _each(fn, items):
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _repeat(fn, times=WHOLE_REPEATS):
+    return _each(lambda _: fn(), range(times))
+
+
+def _peak(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_size(size, fixtures, finviz_url, workdir, memory=True):
+    import analysis
+    import backtest
+    import charts
+    import market_data
+    import news
+    import plotly.graph_objects as go
+    import sentiment
+    import styling
+    import targets
+    from concurrency import MessageLog
+
+    # Fresh caches for this size
+    root = os.path.join(workdir, f"size_{size}")
+    market_data._default = market_data.MarketDataCache(root=os.path.join(root, "market_data"))
+    sentiment._default = sentiment.HeadlineStore(os.path.join(root, "sentiment.sqlite"))
+    news._default = news.HeadlineFetcher(base_url=finviz_url)
+
+    tickers = fixtures.watchlist(size)
+    messages = MessageLog()
+    stages = {}
+
+    def stage(name, samples, repeat_fn=None):
+        stages[name] = _summary(samples, _peak(repeat_fn) if memory and repeat_fn else None)
+
+    # 🌐 Full rerun, cold then warm: bulk prefetch + headlines + concurrent analysis
+    start = time.perf_counter()
+    df = analysis.screen(tickers, messages)
+    cold = time.perf_counter() - start
+    stage("rerun_cold", [cold])
+    stage("rerun_warm", _repeat(lambda: analysis.screen(tickers, messages)), lambda: analysis.screen(tickers, messages))
+
+    # 🧮 Per-ticker engine stages on a warm cache
+    headlines = news.default_fetcher().fetch_many(tickers)
+    stage("analyze_ticker", _each(lambda t: analysis.analyze_ticker(t, messages, headlines.get(t)), tickers),
+          lambda: [analysis.analyze_ticker(t, messages, headlines.get(t)) for t in tickers])
+    stage("get_yield_analysis", _each(lambda t: analysis.get_yield_analysis(t, messages), tickers),
+          lambda: [analysis.get_yield_analysis(t, messages) for t in tickers])
+    stage("get_sentiment", _each(lambda t: analysis.get_sentiment(t, headlines.get(t)), tickers),
+          lambda: [analysis.get_sentiment(t, headlines.get(t)) for t in tickers])
+
+    # 📈 Chart block: window table for the selected ticker, then its figure
+    sample = tickers[:CHART_SAMPLES]
+    stage("chart_targets", _each(lambda t: targets.load_window_targets([t]), sample),
+          lambda: [targets.load_window_targets([t]) for t in sample])
+
+    def draw(ticker):
+        hist = market_data.Ticker(ticker).history(period="5y")
+        fig = go.Figure(charts.price_range_traces(hist))
+        table = targets.load_window_targets([ticker])
+        if (ticker, 3) in table.index:
+            fig.add_hline(y=table.loc[(ticker, 3)]["Target Price"])
+        return fig.to_json()
+
+    stage("chart_render", _each(draw, sample), lambda: [draw(t) for t in sample])
+
+    # 🎨 Styler: full-frame colour masks plus rendering the visible page
+    def style():
+        styling.highlight_styles(df)
+        styling.style_table(styling.page_slice(df, 1)).to_html()
+
+    stage("styler", _each(lambda _: style(), range(STYLER_REPEATS)), style)
+
+    # 🧪 Target-price backtest over every cached trading day of the watchlist
+    stage("backtest", _repeat(lambda: backtest.load_backtest(tickers)), lambda: backtest.load_backtest(tickers))
+
+    return {"tickers": size, "rows": len(df), "stages": stages}
+
+
+def _median_runs(runs):
+    """Per-stage, per-metric median over whole bench runs of the same sizes."""
+    merged = {}
+    for size, first in runs[0].items():
+        stages = {}
+        for name, summary in first["stages"].items():
+            stages[name] = {
+                key: value if key == "n" else round(float(np.median([run[size]["stages"][name][key] for run in runs])), 3)
+                for key, value in summary.items()
+            }
+        merged[size] = dict(first, stages=stages)
+    return merged
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for size, result in results.items():
+        for name, now in result["stages"].items():
+            then = baseline.get(size, {}).get("stages", {}).get(name)
+            if not then:
+                continue
+            latency = "p95_ms" if then["n"] >= MIN_P95_SAMPLES else "p50_ms"
+            for metric, floor in ((latency, NOISE_FLOOR["time_ms"]), ("peak_mb", NOISE_FLOOR["peak_mb"])):
+                if metric in now and metric in then and then[metric] > 0:
+                    grown = now[metric] - then[metric]
+                    if grown > max(then[metric] * tolerance, floor):
+                        regressions.append(f"{size} tickers / {name}: {metric} {then[metric]} -> {now[metric]}")
+    return regressions
+
+
+def print_table(results, out=sys.stdout):
+    print(f"{'size':>6} {'stage':<20} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'total ms':>11} {'peak MB':>8}",
+          file=out)
+    for size, result in results.items():
+        for name, s in result["stages"].items():
+            print(f"{size:>6} {name:<20} {s['n']:>5} {s['p50_ms']:>10.2f} {s['p95_ms']:>10.2f} {s['p99_ms']:>10.2f} "
+                  f"{s['total_ms']:>11.1f} {s.get('peak_mb', float('nan')):>8.1f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the dashboard hot path.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated watchlist sizes")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the baseline")
+    # Timings on a shared 1-vCPU box swing up to ~2x between runs; a 10x regression still fails by far.
+    parser.add_argument("--tolerance", type=float, default=1.0, help="allowed growth over baseline (1.0 = +100%%)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--runs", type=int, default=1, help="repeat the whole bench and keep per-stage medians")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="stockapp-bench-")
+    _isolate(workdir)
+    try:
+        import market_data
+        from bench.fakes import FixtureSet
+
+        fixtures = FixtureSet()
+        market_data.yf = fixtures.yfinance()
+        finviz_url, server = fixtures.serve_finviz()
+
+        runs = []
+        for i in range(args.runs):
+            rundir = os.path.join(workdir, f"run_{i}")
+            os.makedirs(rundir)
+            results = {}
+            for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+                results[str(size)] = run_size(size, fixtures, finviz_url, rundir, memory=not args.no_memory)
+                print(f"... {size} tickers done" + (f" (run {i + 1}/{args.runs})" if args.runs > 1 else ""),
+                      file=sys.stderr)
+            runs.append(results)
+        server.shutdown()
+        results = _median_runs(runs) if len(runs) > 1 else runs[0]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as fh:
+                baseline = json.load(fh)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(baseline, fh, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
@@ -0,0 +1,69 @@
+"""Cold-start budget for the login page.
+
+    python -m bench.startup                  # fail if login is over budget
+    python -m bench.startup --budget 0.3
+
+A fresh interpreter renders the logged-out page with Streamlit's AppTest,
+then reports how long that took and whether any of the heavy engine
+modules were imported on the way. Importing the engine afterwards in the
+same process shows what the login page no longer waits for.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "yfinance", "bs4", "requests", "vaderSentiment")
+DEFAULT_BUDGET = 0.5  # seconds for the login render, after `import streamlit`
+
+_CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+at = AppTest.from_file("streamlit_app.py", default_timeout=60)
+start = time.perf_counter()
+at.run()
+login = time.perf_counter() - start
+rendered = any(getattr(f, "label", "") == "Login" for f in at.button) or len(at.text_input) > 0
+heavy = [m for m in HEAVY if m in sys.modules]
+
+start = time.perf_counter()
+import analysis, targets, styling, warmup, charts
+engine = time.perf_counter() - start
+print(json.dumps({"login_s": login, "engine_s": engine, "heavy": heavy,
+                  "rendered": rendered, "exceptions": [e.message for e in at.exception]}))
+"""
+
+
+def measure():
+    # Default environment (warm-up enabled): nothing may start loading the engine before login.
+    code = f"HEAVY = {HEAVY_MODULES!r}\n{_CHILD}"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the login page's cold-start import budget.")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="seconds (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    result = measure()
+    print(f"login render {result['login_s'] * 1000:.0f} ms (budget {args.budget * 1000:.0f} ms); "
+          f"engine import deferred: {result['engine_s'] * 1000:.0f} ms")
+
+    problems = []
+    if result["exceptions"] or not result["rendered"]:
+        problems.append(f"login page did not render: {result['exceptions']}")
+    if result["heavy"]:
+        problems.append(f"heavy modules imported before login: {', '.join(result['heavy'])}")
+    if result["login_s"] > args.budget:
+        problems.append(f"login render {result['login_s']:.3f}s over budget {args.budget:.3f}s")
+    for line in problems:
+        print(f"FAIL {line}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Lightweight traces for the Price Range Tracker.
+
+The fast mode draws the daily close with WebGL (`Scattergl`), thinned to a
+point budget with Largest-Triangle-Three-Buckets so peaks and troughs
+survive, and draws monthly high/low as step lines with one point per month
+instead of one per day.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+POINT_BUDGET = 500
+
+
+def _dates(index):
+    # Plain YYYY-MM-DD strings are about half the JSON of full ISO timestamps.
+    return index.strftime("%Y-%m-%d")
+
+
+def lttb(x, y, threshold):
+    """Indices of the points LTTB keeps when cutting (x, y) down to `threshold` points."""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # First and last points are fixed; the rest are split into threshold - 2 buckets.
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def _monthly_steps(hist, column, how):
+    monthly = getattr(hist[column].resample("MS"), how)().dropna()
+    # Repeat the last level at the final bar so the step spans the current month.
+    return pd.concat([monthly, pd.Series([monthly.iloc[-1]], index=[hist.index[-1]])]) if len(monthly) else monthly
+
+
+def price_range_traces(hist, budget=POINT_BUDGET):
+    """Daily Close / Monthly High / Monthly Low traces for an OHLC history frame."""
+    close = hist["Close"].dropna()
+    keep = lttb(close.index.asi8, close.to_numpy(), budget)
+    high = _monthly_steps(hist, "High", "max")
+    low = _monthly_steps(hist, "Low", "min")
+    return [
+        go.Scattergl(x=_dates(close.index[keep]), y=close.to_numpy()[keep], mode="lines", name="Daily Close"),
+        go.Scattergl(x=_dates(high.index), y=high.to_numpy(), mode="lines", name="Monthly High",
+                     line=dict(dash="dash", shape="hv")),
+        go.Scattergl(x=_dates(low.index), y=low.to_numpy(), mode="lines", name="Monthly Low",
+                     line=dict(dash="dash", shape="hv")),
+    ]
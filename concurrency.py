@@ -0,0 +1,184 @@
+"""Bounded thread-pool helpers for running per-ticker work concurrently,
+plus the process-wide primitives that keep upstream traffic in check."""
+import contextvars
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+# Each ticker is a handful of blocking HTTP round trips, so threads (not
+# processes) are the right fit. Cap them so a big watchlist can't open
+# hundreds of sockets at once.
+MAX_WORKERS = int(os.environ.get("ANALYSIS_MAX_WORKERS", "8"))
+
+
+class MessageLog:
+    """Thread-safe drop-in for the dashboard's `messages` list.
+
+    Entries appended from `map_ordered` workers are replayed in ticker input
+    order, not in whatever order the threads happened to finish.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._entries = []
+        self._batches = 0
+
+    def new_batch(self):
+        with self._lock:
+            self._batches += 1
+            return self._batches
+
+    @contextmanager
+    def slot(self, batch, index):
+        self._local.key = (batch, index)
+        try:
+            yield
+        finally:
+            self._local.key = None
+
+    def append(self, message):
+        key = getattr(self._local, "key", None)
+        with self._lock:
+            if key is None:
+                # Appended outside any batch: goes after everything logged so far.
+                key = (self._batches, math.inf)
+            self._entries.append((key, len(self._entries), message))
+
+    def __iter__(self):
+        with self._lock:
+            entries = sorted(self._entries, key=lambda e: (e[0], e[1]))
+        return iter([message for _, _, message in entries])
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def _runner(fn, log):
+    batch = log.new_batch() if log is not None else None
+
+    def run(indexed):
+        index, item = indexed
+        if log is None:
+            return fn(item)
+        with log.slot(batch, index):
+            return fn(item)
+
+    return run
+
+
+def map_ordered(fn, items, max_workers=None, log=None):
+    """Apply `fn` to every item on a bounded thread pool; results keep input order."""
+    items = list(items)
+    max_workers = MAX_WORKERS if max_workers is None else max_workers
+    run = _runner(fn, log)
+
+    if max_workers <= 1 or len(items) <= 1:
+        return [run(indexed) for indexed in enumerate(items)]
+    # Workers run in a copy of the caller's context so context variables
+    # (e.g. the active metrics rerun) follow the work onto the pool.
+    contexts = [contextvars.copy_context() for _ in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(lambda indexed: contexts[indexed[0]].run(run, indexed), enumerate(items)))
+
+
+def map_completed(fn, items, max_workers=None, log=None):
+    """Like `map_ordered`, but yields (index, result) as soon as each item finishes.
+
+    Messages still replay in input order. Closing the generator early cancels
+    items that have not started yet.
+    """
+    items = list(items)
+    max_workers = MAX_WORKERS if max_workers is None else max_workers
+    run = _runner(fn, log)
+
+    if max_workers <= 1 or len(items) <= 1:
+        for indexed in enumerate(items):
+            yield indexed[0], run(indexed)
+        return
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(items)))
+    try:
+        futures = {
+            pool.submit(contextvars.copy_context().run, run, indexed): indexed[0] for indexed in enumerate(items)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` acquisitions per second on average, bursts up to `burst`.
+
+    A rate of 0 or less disables the limit.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is free; returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution of `fn`.
+
+    The first caller runs it; callers arriving while it is in flight wait
+    and get the same result (or exception). Nothing is cached afterwards.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, fn):
+        """(result, shared) -- `shared` is True for callers that waited on another's call."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
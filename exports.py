@@ -0,0 +1,117 @@
+"""CSV, Parquet and Excel exports of the summary and deep-dive tables.
+
+Exports are written straight from the typed frames (never through the
+Styler) in row chunks into a spooled temp file, so building a
+multi-thousand-ticker export holds the finished file plus one chunk of
+encoded rows, not a full text copy of the table on top of it. The dashboard
+hands these to `st.download_button` as callables, so nothing is built until
+a button is clicked.
+"""
+import math
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_CHUNK = 2000  # rows per encoded chunk
+SPOOL_LIMIT = 8 * 2 ** 20  # bytes kept in memory before the export spills to disk
+
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def _chunks(df, rows=EXPORT_CHUNK):
+    for start in range(0, len(df), rows):
+        yield df.iloc[start:start + rows]
+
+
+def _spool():
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_LIMIT, mode="w+b")
+
+
+def _finish(out):
+    out.seek(0)
+    with out:
+        return out.read()
+
+
+def to_csv(df):
+    out = _spool()
+    out.write(df.iloc[:0].to_csv(index=False).encode("utf-8"))
+    for chunk in _chunks(df):
+        out.write(chunk.to_csv(index=False, header=False, date_format="%Y-%m-%d").encode("utf-8"))
+    return _finish(out)
+
+
+def to_parquet(df):
+    """Arrow row groups written chunk by chunk, keeping float32 / categorical / date types."""
+    out = _spool()
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in _chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    return _finish(out)
+
+
+def excel_available():
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _excel_columns(chunk, sheet, date_format):
+    """(writer, python values) per column, with missing cells as None."""
+    columns = []
+    for name, dtype in chunk.dtypes.items():
+        values = chunk[name]
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            cells = [None if pd.isna(v) else v.to_pydatetime() for v in values]
+            columns.append((lambda r, c, v: sheet.write_datetime(r, c, v, date_format), cells))
+        elif pd.api.types.is_float_dtype(dtype):
+            cells = [None if math.isnan(v) else v for v in values.to_numpy(dtype=np.float64).tolist()]
+            columns.append((sheet.write_number, cells))
+        else:
+            cells = values.astype(object).where(values.notna(), None).tolist()
+            columns.append((lambda r, c, v: sheet.write_string(r, c, str(v)), cells))
+    return columns
+
+
+def to_excel(df, sheet_name="Sheet1"):
+    """One sheet via XlsxWriter's constant-memory mode, which flushes each row as it goes."""
+    import xlsxwriter
+
+    out = _spool()
+    book = xlsxwriter.Workbook(out, {"constant_memory": True, "in_memory": False})
+    sheet = book.add_worksheet(sheet_name[:31])
+    date_format = book.add_format({"num_format": "yyyy-mm-dd"})
+    sheet.write_row(0, 0, list(df.columns))
+    for col, dtype in enumerate(df.dtypes):
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            sheet.set_column(col, col, 11, date_format)
+
+    row = 1
+    for chunk in _chunks(df):
+        columns = list(enumerate(_excel_columns(chunk, sheet, date_format)))
+        for i in range(len(chunk)):
+            for col, (write, cells) in columns:
+                if cells[i] is not None:
+                    write(row, col, cells[i])
+            row += 1
+    book.close()
+    return _finish(out)
+
+
+def export(df, fmt, sheet_name="Sheet1"):
+    """Bytes of `df` exported in one of FORMATS."""
+    if fmt == "CSV":
+        return to_csv(df)
+    if fmt == "Parquet":
+        return to_parquet(df)
+    return to_excel(df, sheet_name)
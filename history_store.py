@@ -0,0 +1,74 @@
+"""Memory-mapped close and dividend series, one flat file per ticker and field.
+
+Each file is `n` int64 trading dates (nanoseconds, naive exchange-local)
+followed by `n` float32 values, written whole and swapped in atomically.
+Reads map the file and hand back Series that are views straight into the
+page cache: a date-range read binary-searches the mapped dates and only
+touches the pages it slices, and nothing is decoded or copied into the
+worker's heap. The kernel shares and evicts those pages, so a deep dive
+over hundreds of long-history tickers no longer keeps their frames alive.
+"""
+import mmap
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ("close", "dividends")
+_DATE = np.dtype("<i8")
+_VALUE = np.dtype("<f4")
+_ROW_BYTES = _DATE.itemsize + _VALUE.itemsize
+
+
+def _as_naive(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_convert(None) if ts.tzinfo is not None else ts
+
+
+class HistoryStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, ticker_key, field):
+        return os.path.join(self.root, f"{ticker_key}.{field}")
+
+    def mtime(self, ticker_key, field):
+        try:
+            return os.path.getmtime(self.path(ticker_key, field))
+        except OSError:
+            return None
+
+    def write(self, ticker_key, field, series):
+        """Replace the stored `field` with `series` (sorted, NaNs dropped)."""
+        series = series.dropna().sort_index()
+        index = series.index.tz_convert(None) if series.index.tz is not None else series.index
+        dates = index.as_unit("ns").asi8.astype(_DATE, copy=False)
+        path = self.path(ticker_key, field)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(dates.tobytes())
+            fh.write(series.to_numpy(dtype=_VALUE).tobytes())
+        os.replace(tmp, path)
+
+    def read(self, ticker_key, field, start=None, end=None):
+        """Stored `field` within [start, end) as a zero-copy Series, or None if nothing is stored."""
+        try:
+            with open(self.path(ticker_key, field), "rb") as fh:
+                size = os.fstat(fh.fileno()).st_size
+                if size == 0:
+                    buf = b""
+                else:
+                    # The mapping outlives the file handle; the arrays below keep it alive.
+                    buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+        n = size // _ROW_BYTES
+        dates = np.frombuffer(buf, dtype=_DATE, count=n)
+        values = np.frombuffer(buf, dtype=_VALUE, count=n, offset=n * _DATE.itemsize)
+
+        lo = 0 if start is None else np.searchsorted(dates, _as_naive(start).value, side="left")
+        hi = n if end is None else np.searchsorted(dates, _as_naive(end).value, side="left")
+        index = pd.DatetimeIndex(dates[lo:hi].view("datetime64[ns]"), copy=False)
+        return pd.Series(values[lo:hi], index=index, name=field, copy=False)
@@ -0,0 +1,486 @@
+"""On-disk cache for the yfinance payloads the dashboard reads.
+
+`info` lives in SQLite, price history and dividends in per-ticker Parquet
+files. Close prices and dividends are mirrored into a memory-mapped
+`history_store` that the per-ticker analysis reads from. Everything sits
+under one directory, so every session and every worker process on the host
+shares it.
+"""
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from concurrency import SingleFlight, TokenBucket
+from history_store import HistoryStore
+
+yf = None  # yfinance, imported on the first request that needs it (tests may swap in a stand-in)
+
+CACHE_DIR = os.environ.get(
+    "MARKET_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "market_data"),
+)
+
+# ⏱️ Freshness per field, in seconds. Closed daily bars never change, so
+# history only re-checks its tail once HISTORY_TAIL_TTL has passed.
+INFO_TTL = 15 * 60
+DIVIDENDS_TTL = 12 * 60 * 60
+HISTORY_TAIL_TTL = 30 * 60
+FRAME_MEMO = 32  # decoded Parquet frames kept per process for tail merges and charts
+QUOTE_TTL = 15  # seconds a polled last price is shared between sessions
+
+# 🚦 Upstream budget shared by every session in the process. Throttled calls
+# are retried with exponential backoff (YAHOO_BACKOFF, 2x, 4x, ... with jitter).
+YAHOO_RATE = float(os.environ.get("YAHOO_RATE", "4"))  # requests per second; 0 = unlimited
+YAHOO_BURST = int(os.environ.get("YAHOO_BURST", "8"))
+YAHOO_RETRIES = 4
+YAHOO_BACKOFF = 1.0
+
+DOWNLOAD_BATCH = 100
+HISTORY_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+_PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+
+def _payload_bytes(obj):
+    # Decoded size of what Yahoo sent back; the wire bytes are not exposed by yfinance.
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True))
+    return len(json.dumps(obj, default=str))
+
+
+def _yfinance():
+    # A warm cache never touches yfinance, so its import cost is only paid on a miss.
+    global yf
+    if yf is None:
+        import yfinance
+
+        yf = yfinance
+    return yf
+
+
+_bucket = TokenBucket(YAHOO_RATE, YAHOO_BURST)
+_inflight = SingleFlight()
+
+
+def _status_code(error):
+    response = getattr(error, "response", None)  # requests / curl_cffi HTTPError
+    for source in (response, error):
+        status = getattr(source, "status_code", None) or getattr(source, "status", None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def _is_throttled(error):
+    # yfinance raises YFRateLimitError on recent versions; older ones raise the HTTP error itself.
+    # Match the status code or reason only: "429" alone also turns up in tickers, dates and prices.
+    return (type(error).__name__ == "YFRateLimitError" or _status_code(error) == 429
+            or "Too Many Requests" in str(error))
+
+
+def _request(call, fn):
+    for attempt in range(YAHOO_RETRIES + 1):
+        if _bucket.acquire():
+            metrics.count("rate_limit_waits", source="yahoo")
+        metrics.count("http_requests", source="yahoo", call=call)
+        try:
+            with metrics.span(f"yahoo.{call}"):
+                result = fn()
+        except Exception as e:
+            if attempt == YAHOO_RETRIES or not _is_throttled(e):
+                raise
+            metrics.count("http_retries", source="yahoo", call=call)
+            time.sleep(YAHOO_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+            continue
+        if result is not None:
+            metrics.count("http_bytes", _payload_bytes(result), source="yahoo")
+        return result
+
+
+def _yahoo(call, key, fn):
+    """One yfinance request: rate limited, retried when throttled, and shared.
+
+    Identical requests already in flight (same `call` and `key`, from any
+    session) wait for that one instead of going upstream again.
+    """
+    result, shared = _inflight.do((call,) + key, lambda: _request(call, fn))
+    if shared:
+        metrics.count("coalesced", source="yahoo", call=call)
+    return result
+
+
+def _file_key(ticker):
+    return re.sub(r"[^A-Z0-9._-]", "_", ticker.upper())
+
+
+def _trading_dates(obj):
+    # Bulk downloads come back keyed by naive exchange-local dates, so single
+    # fetches are stored the same way and both paths line up.
+    if not isinstance(obj.index, pd.DatetimeIndex):
+        # yfinance returns an empty RangeIndex Series for tickers that never paid
+        if len(obj):
+            return obj
+        obj = obj.copy()
+        obj.index = pd.DatetimeIndex([], dtype="datetime64[ns]")
+        return obj
+    if obj.index.tz is not None:
+        obj = obj.copy()
+        obj.index = obj.index.tz_localize(None)
+    return obj
+
+
+def _as_index_time(value, tz):
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None and tz is not None:
+        return ts.tz_localize(tz)
+    if ts.tzinfo is not None and tz is None:
+        return ts.tz_convert(None)
+    return ts
+
+
+def _period_start(period, tz=None):
+    """Start of a yfinance-style period ("5y", "6mo", ...) counted back from now; None for "max"."""
+    if not period or period == "max":
+        return None
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    offset = pd.DateOffset(**{_PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+    return pd.Timestamp.now(tz=tz) - offset
+
+
+def slice_history(frame, period=None, start=None, end=None):
+    """Cut a stored max-history frame down to a yfinance-style period or start/end window."""
+    if frame.empty:
+        return frame
+    tz = frame.index.tz
+    if period and period != "max":
+        start = _period_start(period, tz)
+    mask = np.ones(len(frame), dtype=bool)
+    if start is not None:
+        mask &= frame.index >= _as_index_time(start, tz)
+    if end is not None:
+        mask &= frame.index < _as_index_time(end, tz)
+    return frame[mask]
+
+
+class MarketDataCache:
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        for sub in ("history", "dividends"):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+        self.db_path = os.path.join(root, "cache.sqlite")
+        self.store = HistoryStore(os.path.join(root, "series"))
+        self._frames = OrderedDict()
+        self._quotes = {}
+        self._lock = threading.Lock()
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS info ("
+            "ticker TEXT PRIMARY KEY, payload TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS series ("
+            "ticker TEXT, field TEXT, fetched_at REAL NOT NULL, PRIMARY KEY (ticker, field))"
+        )
+
+    # 🗃️ SQLite helpers -- one short-lived connection per call keeps this thread-safe
+    def _execute(self, sql, params=()):
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(sql, params)
+
+    def _query_one(self, sql, params=()):
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def _stamp(self, ticker, field):
+        row = self._query_one("SELECT fetched_at FROM series WHERE ticker = ? AND field = ?", (ticker, field))
+        return row[0] if row else None
+
+    def _set_stamp(self, ticker, field):
+        self._execute("INSERT OR REPLACE INTO series VALUES (?, ?, ?)", (ticker, field, time.time()))
+
+    # 📦 Parquet helpers -- the last FRAME_MEMO decodes are memoized on mtime
+    def _path(self, field, ticker):
+        return os.path.join(self.root, field, f"{_file_key(ticker)}.parquet")
+
+    def _remember(self, path, mtime, frame):
+        with self._lock:
+            self._frames[path] = (mtime, frame)
+            self._frames.move_to_end(path)
+            while len(self._frames) > FRAME_MEMO:
+                self._frames.popitem(last=False)
+
+    def _read_frame(self, path):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            hit = self._frames.get(path)
+            if hit and hit[0] == mtime:
+                self._frames.move_to_end(path)
+                return hit[1]
+        frame = _trading_dates(pd.read_parquet(path))
+        self._remember(path, mtime, frame)
+        return frame
+
+    def _write_frame(self, path, frame):
+        frame = _trading_dates(frame)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        frame.to_parquet(tmp)
+        os.replace(tmp, path)
+        self._remember(path, os.path.getmtime(path), frame)
+
+    def _save(self, field, ticker, frame):
+        """Write a refreshed history/dividends frame, mirror it into the mapped store, then stamp it."""
+        self._write_frame(self._path(field, ticker), frame)
+        self._mirror(field, ticker, frame)
+        self._set_stamp(ticker, field)
+
+    def _mirror(self, field, ticker, frame):
+        if field == "history":
+            self.store.write(_file_key(ticker), "close", frame["Close"])
+        else:
+            self.store.write(_file_key(ticker), "dividends", frame["Dividends"])
+
+    # 🌐 Public fields
+    def info(self, ticker):
+        row = self._query_one("SELECT payload, fetched_at FROM info WHERE ticker = ?", (ticker,))
+        if row and time.time() - row[1] < INFO_TTL:
+            metrics.count("cache_hits", layer="info")
+            return json.loads(row[0])
+        metrics.count("cache_misses", layer="info")
+        info = _yahoo("info", (ticker,), lambda: _yfinance().Ticker(ticker).info) or {}
+        payload = json.dumps(info, default=str)
+        self._execute("INSERT OR REPLACE INTO info VALUES (?, ?, ?)", (ticker, payload, time.time()))
+        return info
+
+    def dividends(self, ticker):
+        return self._dividends_frame(ticker)["Dividends"].copy()
+
+    def history(self, ticker, period=None, start=None, end=None):
+        return slice_history(self._history_frame(ticker), period=period, start=start, end=end).copy()
+
+    def series(self, ticker, field, period=None, start=None, end=None):
+        """Close prices or dividends ("close" / "dividends") as a read-only view over the mapped store.
+
+        While the stamp is fresh no Parquet is decoded at all; a stale field
+        is refreshed through the same path as `history` / `dividends` first.
+        """
+        source, ttl = ("history", HISTORY_TAIL_TTL) if field == "close" else ("dividends", DIVIDENDS_TTL)
+        key = _file_key(ticker)
+        stamp = self._stamp(ticker, source)
+        mapped = self.store.mtime(key, field)
+        if stamp is not None and time.time() - stamp < ttl and mapped is not None:
+            metrics.count("cache_hits", layer=source)
+        else:
+            frame = self._history_frame(ticker) if source == "history" else self._dividends_frame(ticker)
+            mapped = self.store.mtime(key, field)
+            if mapped is None or mapped < os.path.getmtime(self._path(source, ticker)):
+                self._mirror(source, ticker, frame)  # Parquet cached before the store existed
+        return self.store.read(key, field, start=_period_start(period) if period else start, end=end)
+
+    def series_stamp(self, ticker, field):
+        """When the mapped `field` series of `ticker` was last rewritten, or None."""
+        return self.store.mtime(_file_key(ticker), field)
+
+    def quotes(self, tickers):
+        """Latest price per ticker from bulk downloads, shared by every session for QUOTE_TTL seconds."""
+        tickers = list(dict.fromkeys(tickers))
+        now = time.time()
+        with self._lock:
+            stale = [t for t in tickers if now - self._quotes.get(t, (0, None))[0] >= QUOTE_TTL]
+        metrics.count("cache_hits", len(tickers) - len(stale), layer="quotes")
+        metrics.count("cache_misses", len(stale), layer="quotes")
+        for batch in _batches(stale):
+            data = _download(batch, period="5d")
+            fetched = time.time()
+            prices = {}
+            for ticker in batch:
+                frame = _ticker_frame(data, ticker)
+                prices[ticker] = (fetched, float(frame["Close"].iloc[-1]) if frame is not None else None)
+            with self._lock:
+                self._quotes.update(prices)
+        with self._lock:
+            return {t: self._quotes[t][1] for t in tickers if t in self._quotes}
+
+    def _dividends_frame(self, ticker):
+        stamp = self._stamp(ticker, "dividends")
+        frame = self._read_frame(self._path("dividends", ticker)) if stamp is not None else None
+        if frame is None or time.time() - stamp >= DIVIDENDS_TTL:
+            metrics.count("cache_misses", layer="dividends")
+            dividends = _trading_dates(_yahoo("dividends", (ticker,), lambda: _yfinance().Ticker(ticker).dividends))
+            frame = dividends.astype(float).rename("Dividends").to_frame()
+            self._save("dividends", ticker, frame)
+        else:
+            metrics.count("cache_hits", layer="dividends")
+        return frame
+
+    def _history_frame(self, ticker):
+        stamp = self._stamp(ticker, "history")
+        frame = self._read_frame(self._path("history", ticker)) if stamp is not None else None
+        if frame is None or time.time() - stamp >= HISTORY_TAIL_TTL:
+            metrics.count("cache_misses", layer="history")
+            frame = self._refresh_history(ticker, frame)
+            self._save("history", ticker, frame)
+        else:
+            metrics.count("cache_hits", layer="history")
+        return frame
+
+    def _refresh_history(self, ticker, stored):
+        if stored is None or len(stored) < 2:
+            return _max_history(ticker)
+        start = _anchor(stored).strftime("%Y-%m-%d")
+        tail = _trading_dates(
+            _yahoo("history", (ticker, start), lambda: _yfinance().Ticker(ticker).history(start=start))
+        )
+        merged = _merge_tail(stored, tail)
+        return merged if merged is not None else _max_history(ticker)
+
+    def _is_stale(self, ticker, now):
+        return any(
+            now - (self._stamp(ticker, field) or 0) >= ttl
+            for field, ttl in (("history", HISTORY_TAIL_TTL), ("dividends", DIVIDENDS_TTL))
+        )
+
+    def prefetch(self, tickers):
+        """Refresh history and dividends for every stale ticker with bulk `yf.download` calls.
+
+        Tickers with nothing stored get their max history in shared
+        downloads; tickers already on disk share downloads that only cover
+        the tail. Afterwards every section of the dashboard slices from the cache.
+        """
+        now = time.time()
+        cold, warm = [], {}
+        for ticker in dict.fromkeys(tickers):
+            if not self._is_stale(ticker, now):
+                continue
+            stored = self._read_frame(self._path("history", ticker))
+            if stored is None or len(stored) < 2:
+                cold.append(ticker)
+            else:
+                warm[ticker] = stored
+
+        # Batches keep one download's union-of-dates frame from growing with the universe.
+        for batch in _batches(cold):
+            data = _download(batch, period="max")
+            for ticker in batch:
+                frame = _ticker_frame(data, ticker)
+                if frame is not None:
+                    self._store_bulk(ticker, frame)
+
+        for batch in _batches(list(warm)):
+            start = min(_anchor(warm[ticker]) for ticker in batch)
+            data = _download(batch, start=start.strftime("%Y-%m-%d"))
+            for ticker in batch:
+                tail = _ticker_frame(data, ticker)
+                if tail is None:
+                    continue
+                merged = _merge_tail(warm[ticker], tail)
+                if merged is None:
+                    # Re-based by a new dividend or split: pull this one in full.
+                    merged = _max_history(ticker)
+                self._store_bulk(ticker, merged)
+
+    def _store_bulk(self, ticker, frame):
+        frame = frame.reindex(columns=HISTORY_COLUMNS)
+        frame[["Dividends", "Stock Splits"]] = frame[["Dividends", "Stock Splits"]].fillna(0.0)
+        dividends = frame["Dividends"][frame["Dividends"] > 0]
+        self._save("history", ticker, frame)
+        self._save("dividends", ticker, dividends.to_frame())
+
+
+def _anchor(stored):
+    # The last *closed* bar we hold; the final row may still be today's live bar.
+    return stored.index[-2]
+
+
+def _merge_tail(stored, tail):
+    """Append a freshly pulled tail to stored bars, or None if the series was re-based."""
+    if tail.empty:
+        return stored
+    anchor = _anchor(stored)
+    if anchor in tail.index and abs(tail.at[anchor, "Close"] - stored.at[anchor, "Close"]) > 1e-6:
+        return None
+    return pd.concat([stored[stored.index < tail.index[0]], tail])
+
+
+def _batches(tickers):
+    return [tickers[i:i + DOWNLOAD_BATCH] for i in range(0, len(tickers), DOWNLOAD_BATCH)]
+
+
+def _max_history(ticker):
+    return _trading_dates(_yahoo("history", (ticker, "max"), lambda: _yfinance().Ticker(ticker).history(period="max")))
+
+
+def _download(tickers, **window):
+    return _yahoo(
+        "download", (tuple(tickers), tuple(sorted(window.items()))),
+        lambda: _yfinance().download(
+            tickers, actions=True, group_by="ticker", auto_adjust=True, progress=False, **window
+        ),
+    )
+
+
+def _ticker_frame(data, ticker):
+    key = ticker.upper()
+    if data is None or data.empty or key not in data.columns.get_level_values(0):
+        return None
+    frame = data[key].dropna(how="all", subset=["Close"])
+    return frame if not frame.empty else None
+
+
+class Ticker:
+    """Stand-in for the parts of `yf.Ticker` the dashboard reads, served from the cache."""
+
+    def __init__(self, ticker, cache=None):
+        self.ticker = ticker
+        self._cache = cache or default_cache()
+        self._info = None
+
+    @property
+    def info(self):
+        if self._info is None:
+            self._info = self._cache.info(self.ticker)
+        return self._info
+
+    @property
+    def dividends(self):
+        return self._cache.dividends(self.ticker)
+
+    def history(self, period=None, start=None, end=None):
+        if period is None and start is None:
+            period = "1mo"
+        return self._cache.history(self.ticker, period=period, start=start, end=end)
+
+    def closes(self, period=None, start=None, end=None):
+        """Close prices only, zero-copy from the mapped store (whole history by default)."""
+        return self._cache.series(self.ticker, "close", period=period, start=start, end=end)
+
+    def dividend_series(self, period=None, start=None, end=None):
+        return self._cache.series(self.ticker, "dividends", period=period, start=start, end=end)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = MarketDataCache()
+        return _default
@@ -0,0 +1,241 @@
+"""Timing spans and counters for the dashboard hot path.
+
+`span("fetch.prefetch")` times a block and `count("http_requests",
+source="finviz")` bumps a counter. Both feed a process-wide registry and,
+while a dashboard rerun is active, that rerun's own `Rerun` record. The
+active rerun lives in a context variable; `map_ordered` copies the context
+into its workers, so the threads started for one session's rerun report to
+that session only. Background work such as preset warm-up reaches the
+registry but no rerun.
+
+Finishing a rerun appends one JSON line to METRICS_DIR/reruns.jsonl and
+rewrites a Prometheus text file (node_exporter textfile format) with
+per-watchlist rerun-latency histograms, stage timings and counters. The
+log rolls over to reruns.jsonl.1 once it passes METRICS_LOG_MAX_BYTES, and
+.prom files left behind by worker processes that have exited are removed.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_DIR = os.environ.get(
+    "METRICS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "metrics"),
+)
+RERUN_LOG = "reruns.jsonl"
+RERUN_LOG_MAX_BYTES = int(os.environ.get("METRICS_LOG_MAX_BYTES", 10 * 1024 * 1024))  # one rotated file is kept
+RERUN_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+logger = logging.getLogger(__name__)
+_active = contextvars.ContextVar("metrics_rerun", default=None)
+_export_lock = threading.Lock()
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+class Rerun:
+    """Spans and counters for one dashboard rerun."""
+
+    def __init__(self, watchlist="custom", tickers=0):
+        self.watchlist = watchlist
+        self.tickers = tickers
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.seconds = None
+        self.spans = {}  # name -> [calls, total seconds, max seconds]
+        self.counters = {}  # (name, labels) -> value
+        self._lock = threading.Lock()
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            calls, total, longest = self.spans.get(name, (0, 0.0, 0.0))
+            self.spans[name] = [calls + 1, total + seconds, max(longest, seconds)]
+
+    def add_count(self, key, value):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "ts": round(self.started, 3),
+                "watchlist": self.watchlist,
+                "tickers": self.tickers,
+                "rerun_ms": round((self.seconds or 0) * 1000, 2),
+                "spans": {
+                    name: {"calls": c, "total_ms": round(t * 1000, 2), "max_ms": round(m * 1000, 2)}
+                    for name, (c, t, m) in sorted(self.spans.items())
+                },
+                "counters": {
+                    name + "".join(f"[{k}={v}]" for k, v in labels): value
+                    for (name, labels), value in sorted(self.counters.items())
+                },
+            }
+
+
+class Registry:
+    """Process-wide totals, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.counters = {}
+        self.stages = {}  # stage -> [calls, total seconds]
+        self.reruns = {}  # watchlist -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            calls, total = self.stages.get(name, (0, 0.0))
+            self.stages[name] = [calls + 1, total + seconds]
+
+    def add_count(self, key, value):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe_rerun(self, watchlist, seconds):
+        with self._lock:
+            hist = self.reruns.setdefault(watchlist, [0] * len(RERUN_BUCKETS) + [0, 0.0])
+            for i, bound in enumerate(RERUN_BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += 1
+            hist[-1] += seconds
+
+    def prometheus(self):
+        pid = os.getpid()
+        lines = [
+            "# HELP stockapp_rerun_seconds Dashboard rerun latency.",
+            "# TYPE stockapp_rerun_seconds histogram",
+        ]
+        with self._lock:
+            for watchlist, hist in sorted(self.reruns.items()):
+                labels = f'pid="{pid}",watchlist="{_escape(watchlist)}"'
+                for bound, n in zip(RERUN_BUCKETS, hist):
+                    lines.append(f'stockapp_rerun_seconds_bucket{{{labels},le="{bound}"}} {n}')
+                lines.append(f'stockapp_rerun_seconds_bucket{{{labels},le="+Inf"}} {hist[-2]}')
+                lines.append(f"stockapp_rerun_seconds_count{{{labels}}} {hist[-2]}")
+                lines.append(f"stockapp_rerun_seconds_sum{{{labels}}} {hist[-1]:.6f}")
+
+            lines += [
+                "# HELP stockapp_stage_seconds_total Time spent per instrumented stage.",
+                "# TYPE stockapp_stage_seconds_total counter",
+            ]
+            for stage, (_, total) in sorted(self.stages.items()):
+                lines.append(f'stockapp_stage_seconds_total{{pid="{pid}",stage="{stage}"}} {total:.6f}')
+            lines += [
+                "# HELP stockapp_stage_calls_total Calls per instrumented stage.",
+                "# TYPE stockapp_stage_calls_total counter",
+            ]
+            for stage, (calls, _) in sorted(self.stages.items()):
+                lines.append(f'stockapp_stage_calls_total{{pid="{pid}",stage="{stage}"}} {calls}')
+
+            seen = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE stockapp_{name}_total counter")
+                label_text = ",".join([f'pid="{pid}"'] + [f'{k}="{_escape(v)}"' for k, v in labels])
+                lines.append(f"stockapp_{name}_total{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+
+# ⏱️ Recording
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        registry.add_span(name, seconds)
+        rerun = _active.get()
+        if rerun is not None:
+            rerun.add_span(name, seconds)
+
+
+def count(name, value=1, **labels):
+    key = _key(name, labels)
+    registry.add_count(key, value)
+    rerun = _active.get()
+    if rerun is not None:
+        rerun.add_count(key, value)
+
+
+# 🔁 Rerun lifecycle
+def start_rerun(watchlist="custom", tickers=0):
+    rerun = Rerun(watchlist, tickers)
+    _active.set(rerun)
+    return rerun
+
+
+def finish_rerun(rerun, out_dir=None):
+    """Close `rerun`, then export it as a JSON log line and refresh the Prometheus file."""
+    rerun.seconds = time.perf_counter() - rerun._t0
+    _active.set(None)
+    registry.observe_rerun(rerun.watchlist, rerun.seconds)
+    record = rerun.as_dict()
+    logger.info(json.dumps(record))
+    try:
+        export(record, out_dir or METRICS_DIR)
+    except OSError:
+        pass  # metrics must never break the page
+    return record
+
+
+def prometheus_path(out_dir=None):
+    # One file per worker process; the pid label keeps their series apart.
+    return os.path.join(out_dir or METRICS_DIR, f"stockapp_{os.getpid()}.prom")
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by someone else
+    return True
+
+
+def _sweep_stale(out_dir):
+    """Remove .prom files whose worker process is gone, so node_exporter stops serving them."""
+    for name in os.listdir(out_dir):
+        pid = name[len("stockapp_"):-len(".prom")]
+        if not (name.startswith("stockapp_") and name.endswith(".prom") and pid.isdigit()):
+            continue
+        if int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            try:
+                os.remove(os.path.join(out_dir, name))
+            except FileNotFoundError:
+                pass  # another worker swept it first
+
+
+def export(record, out_dir=METRICS_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    log = os.path.join(out_dir, RERUN_LOG)
+    with _export_lock:
+        try:
+            if os.path.getsize(log) >= RERUN_LOG_MAX_BYTES:
+                os.replace(log, f"{log}.1")
+        except FileNotFoundError:
+            pass
+        with open(log, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record) + "\n")
+    path = prometheus_path(out_dir)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(registry.prometheus())
+    os.replace(tmp, path)
+    _sweep_stale(out_dir)
@@ -0,0 +1,117 @@
+"""Watchlist monitor: poll quotes, re-zone only what moved, alert on crossings.
+
+A `Monitor` keeps the watchlist's last price, target lines and zone in
+NumPy arrays. Each tick polls every quote in one bulk call (shared between
+sessions by `market_data.QUOTE_TTL`), then does work only for the tickers
+whose price moved or whose mapped close / dividend series was rewritten:
+target lines are rebuilt for the latter, zones for both. A tick over an
+unchanged watchlist is one quote lookup and a few array compares.
+"""
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import market_data
+import metrics
+from targets import ZONE_LIMITS, ZONES, load_window_targets
+
+INTERVALS = {"15 s": 15, "30 s": 30, "1 min": 60, "5 min": 300}  # poll interval choices
+MAX_ALERTS = 50
+LINES = ("Target", "90% safe zone", "80% safe zone")  # the prices at ZONE_LIMITS
+FIELDS = ("close", "dividends")  # mapped series whose rewrite means new target lines
+
+
+class Monitor:
+    def __init__(self, tickers, years=5, cache=None):
+        self.tickers = list(dict.fromkeys(tickers))
+        self.years = years
+        self.cache = cache or market_data.default_cache()
+        n = len(self.tickers)
+        self.prices = np.full(n, np.nan)
+        self.stamps = np.full((n, len(FIELDS)), np.nan)  # store mtimes per FIELDS
+        self.levels = np.full((n, len(ZONE_LIMITS)), np.nan)  # target, 90% and 80% safe-zone prices
+        self.zones = np.full(n, -1, dtype=np.int8)
+        self.alerts = deque(maxlen=MAX_ALERTS)
+        self.ticks = 0
+        self.last_changed = 0
+
+    def _stamps(self, tickers):
+        return np.array([[self.cache.series_stamp(t, field) or np.nan for field in FIELDS] for t in tickers])
+
+    def _unchanged(self, now, then):
+        return (now == then) | (np.isnan(now) & np.isnan(then))
+
+    def _poll(self):
+        quotes = self.cache.quotes(self.tickers)
+        prices = np.array([quotes.get(t) for t in self.tickers], dtype=float)
+        return prices, self._stamps(self.tickers).reshape(len(self.tickers), len(FIELDS))
+
+    def _refresh_levels(self, rows, stamps):
+        names = [self.tickers[i] for i in rows]
+        targets = load_window_targets(names, years=(self.years,))
+        # Loading may itself refresh a stale series; take those stamps so the next tick doesn't redo it.
+        stamps[rows] = self._stamps(names)
+        for i in rows:
+            key = (self.tickers[i], self.years)
+            if key in targets.index:
+                line = targets.loc[key, ["Target Price", "Safe Zone 90", "Safe Zone 80"]].to_numpy(dtype=float)
+                self.levels[i] = np.where(line > 0, line, np.nan)
+            else:
+                self.levels[i] = np.nan
+
+    def tick(self):
+        """Poll once; returns the alerts raised by this tick."""
+        prices, stamps = self._poll()
+        moved = ~self._unchanged(prices, self.prices)
+        rewritten = ~self._unchanged(stamps, self.stamps).all(axis=1)
+        changed = np.flatnonzero(moved | rewritten)
+        self.ticks += 1
+        self.last_changed = len(changed)
+        metrics.count("monitor_changed", len(changed))
+        if not len(changed):
+            return []
+
+        if rewritten.any():
+            self._refresh_levels(np.flatnonzero(rewritten), stamps)
+        self.prices[changed] = prices[changed]
+        self.stamps[changed] = stamps[changed]
+
+        levels = self.levels[changed]
+        price = self.prices[changed]
+        zone = (price[:, None] > levels).sum(axis=1).astype(np.int8)
+        zone[np.isnan(price) | np.isnan(levels).any(axis=1)] = -1
+        before = self.zones[changed]
+        self.zones[changed] = zone
+
+        raised = []
+        stamp = pd.Timestamp.now()
+        for i, old, new in zip(changed, before, zone):
+            if old < 0 or new < 0 or old == new:
+                continue
+            # Falling crosses name the lowest line passed; rising ones the highest.
+            line = LINES[new] if new < old else LINES[new - 1]
+            raised.append({
+                "Time": stamp,
+                "Ticker": self.tickers[i],
+                "Price": self.prices[i],
+                "From": ZONES[old],
+                "To": ZONES[new],
+                "Crossed": f"{line} {'down' if new < old else 'up'}",
+            })
+        self.alerts.extendleft(raised)
+        return raised
+
+    def table(self):
+        """Current price, lines and zone per ticker."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gap = (self.prices / self.levels[:, 0] - 1) * 100
+        return pd.DataFrame({
+            "Ticker": self.tickers,
+            "Price": self.prices,
+            "Target Price": self.levels[:, 0],
+            "Safe Zone 90": self.levels[:, 1],
+            "Safe Zone 80": self.levels[:, 2],
+            "vs Target (%)": gap,
+            "Zone": [ZONES[z] if z >= 0 else None for z in self.zones],
+        })
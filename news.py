@@ -0,0 +1,110 @@
+"""Finviz headline fetching for the sentiment column.
+
+One pooled `requests.Session` per process, strict timeouts, a TTL cache of
+parsed headlines and conditional GETs (ETag / Last-Modified) once the TTL
+runs out. Point FINVIZ_URL at a local server that serves saved quote pages
+to run it offline.
+"""
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from concurrency import MAX_WORKERS, map_ordered
+
+FINVIZ_URL = os.environ.get("FINVIZ_URL", "https://finviz.com/quote.ashx")
+HEADLINE_TTL = 10 * 60
+TIMEOUT = (3.05, 6)  # (connect, read) seconds
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+def parse_headlines(html):
+    from bs4 import BeautifulSoup  # only needed once a page actually comes back
+
+    soup = BeautifulSoup(html, "html.parser")
+    news_table = soup.find(id="news-table")
+    if news_table is None:
+        raise ValueError("no news table on page")
+    return [row.a.text for row in news_table.find_all("tr") if row.a]
+
+
+class HeadlineFetcher:
+    def __init__(self, base_url=FINVIZ_URL, ttl=HEADLINE_TTL, timeout=TIMEOUT, max_workers=MAX_WORKERS):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(max_workers, 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(HEADERS)
+        self._cache = {}  # ticker -> {"at", "etag", "modified", "headlines"}
+        self._lock = threading.Lock()
+
+    def fetch(self, ticker):
+        with self._lock:
+            entry = self._cache.get(ticker)
+        if entry and time.time() - entry["at"] < self.ttl:
+            metrics.count("cache_hits", layer="headlines")
+            return entry["headlines"]
+        metrics.count("cache_misses", layer="headlines")
+
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["modified"]:
+            headers["If-Modified-Since"] = entry["modified"]
+
+        try:
+            with metrics.span("finviz.get"):
+                resp = self.session.get(self.base_url, params={"t": ticker}, headers=headers, timeout=self.timeout)
+            metrics.count("http_requests", source="finviz", status=resp.status_code)
+            metrics.count("http_bytes", len(resp.content), source="finviz")
+            if resp.status_code == 304 and entry:
+                headlines = entry["headlines"]
+            else:
+                resp.raise_for_status()
+                headlines = parse_headlines(resp.content)
+        except Exception:
+            metrics.count("http_errors", source="finviz")
+            if entry:
+                return entry["headlines"]  # stale beats nothing when Finviz is slow or down
+            raise
+
+        previous = entry or {}
+        with self._lock:
+            self._cache[ticker] = {
+                "at": time.time(),
+                "etag": resp.headers.get("ETag") or previous.get("etag"),
+                "modified": resp.headers.get("Last-Modified") or previous.get("modified"),
+                "headlines": headlines,
+            }
+        return headlines
+
+    def fetch_many(self, tickers):
+        """Headlines for every ticker, fetched concurrently; None where a fetch failed."""
+        tickers = list(dict.fromkeys(tickers))
+
+        def safe_fetch(ticker):
+            try:
+                return self.fetch(ticker)
+            except Exception:
+                return None
+
+        return dict(zip(tickers, map_ordered(safe_fetch, tickers, max_workers=self.max_workers)))
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_fetcher():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = HeadlineFetcher()
+        return _default
@@ -0,0 +1,15 @@
+"""Fixed watchlists behind the dashboard's preset buttons."""
+
+PRESETS = {
+    "Pei Stocks": [
+        "F9D.si", "C38U.si", "9CI.si", "C52.si", "TCU.si", "P34.si", "F99.si", "H02.si", "H13.si", "H78.si",
+        "C07.si", "J36.si", "CJLU.si", "Q01.si", "S61.si", "OV8.si", "S68.si", "S63.si", "Y92.si", "AGS.si",
+        "WJP.si", "F34.si", "BSL.si"
+    ],
+    "Jay Stocks": [
+        "TGT", "GOOGL", "GRAB", "TSLA", "DIS"
+    ],
+    "SG Banks": [
+        "U11.SI", "D05.SI", "O39.SI", "YF8.SI", "AIY.SI", "CHJ.SI", "S41.SI", "S23.SI", "TCU.SI", "G50.SI"
+    ],
+}
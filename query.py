@@ -0,0 +1,155 @@
+"""Indexed filter, sort and group-by over a screened table.
+
+`TableIndex` is built once per settled table. Categorical columns (sector,
+industry, sentiment) get a posting list per category: the row positions
+grouped by category code, with offsets into them, so "Sector in (...)" is
+a few slice assignments instead of a string compare per row. Numeric
+columns are read once as float arrays, and sort ranks are built lazily per
+(column, direction), so a multi-column sort is one `lexsort` over the
+matching rows only. Queries hand back row positions; callers slice and
+style just the page they show.
+"""
+import numpy as np
+import pandas as pd
+
+INDEXED = ("Sector", "Industry", "Sentiment", "Sentiment Trend")
+COMPARISONS = ("<", "<=", ">", ">=", "==", "!=")
+TEXT_OPS = ("contains", "startswith", "endswith")
+ROLLUP_MEDIANS = ("Dividend Yield (%)", "PE Ratio")  # summary columns rolled up per group
+
+
+class TableIndex:
+    def __init__(self, frame):
+        self.frame = frame.reset_index(drop=True)
+        self.size = len(self.frame)
+        self._postings = {}
+        for col in INDEXED:
+            if col in self.frame.columns and isinstance(self.frame[col].dtype, pd.CategoricalDtype):
+                self._postings[col] = self._posting(self.frame[col])
+        self._numbers = {}
+        self._ranks = {}
+
+    @staticmethod
+    def _posting(column):
+        # Missing values (code -1) become group 0, so category c lives at offsets[c + 1]:offsets[c + 2].
+        codes = column.cat.codes.to_numpy().astype(np.intp) + 1
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes, minlength=len(column.cat.categories) + 1)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return list(column.cat.categories), codes, order, offsets
+
+    def indexed_columns(self):
+        return list(self._postings)
+
+    def categories(self, column):
+        """(category, row count) pairs for an indexed column, most common first."""
+        names, _, _, offsets = self._postings[column]
+        counts = np.diff(offsets)[1:]
+        return sorted(((name, int(n)) for name, n in zip(names, counts) if n), key=lambda item: -item[1])
+
+    def numeric_columns(self):
+        return [col for col, dtype in self.frame.dtypes.items() if pd.api.types.is_float_dtype(dtype)]
+
+    def _number(self, column):
+        if column not in self._numbers:
+            self._numbers[column] = self.frame[column].to_numpy(dtype=float, na_value=np.nan)
+        return self._numbers[column]
+
+    def _rank(self, column, ascending):
+        key = (column, ascending)
+        if key not in self._ranks:
+            # Dense ranks, so ties fall through to the next sort key; missing (-1) sorts last either way.
+            codes, uniques = pd.factorize(self.frame[column], sort=True)
+            ranks = codes if ascending else len(uniques) - 1 - codes
+            self._ranks[key] = np.where(codes < 0, len(uniques), ranks)
+        return self._ranks[key]
+
+    def _member(self, column, values):
+        if column not in self._postings:
+            return self.frame[column].isin(values).to_numpy(dtype=bool)
+        names, _, order, offsets = self._postings[column]
+        mask = np.zeros(self.size, dtype=bool)
+        positions = {name: code for code, name in enumerate(names)}
+        for value in values:
+            code = positions.get(value)
+            if code is not None:
+                mask[order[offsets[code + 1]:offsets[code + 2]]] = True
+        return mask
+
+    def _compare(self, column, op, value):
+        left = self._number(column)
+        right = self._number(value) if isinstance(value, str) else float(value)
+        with np.errstate(invalid="ignore"):
+            if op == "<":
+                return left < right
+            if op == "<=":
+                return left <= right
+            if op == ">":
+                return left > right
+            if op == ">=":
+                return left >= right
+            if op == "==":
+                return left == right
+            return (left != right) & ~np.isnan(left)
+
+    def _text(self, column, op, value):
+        text = self.frame[column].astype("string").str.upper()
+        value = str(value).upper()
+        if op == "contains":
+            hit = text.str.contains(value, regex=False)
+        elif op == "startswith":
+            hit = text.str.startswith(value)
+        else:
+            hit = text.str.endswith(value)
+        return hit.fillna(False).to_numpy(dtype=bool)
+
+    def select(self, filters=()):
+        """Row positions matching every (column, op, value) filter, in table order.
+
+        `op` is "in" (value is a list), one of COMPARISONS (value is a number
+        or another numeric column's name) or one of TEXT_OPS. Unknown columns
+        or ops raise ValueError.
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for column, op, value in filters:
+            if column not in self.frame.columns or (isinstance(value, str) and op in COMPARISONS
+                                                    and value not in self.frame.columns):
+                raise ValueError(f"Unknown column in filter: {column} {op} {value}")
+            if op == "in":
+                mask &= self._member(column, value)
+            elif op in COMPARISONS:
+                mask &= self._compare(column, op, value)
+            elif op in TEXT_OPS:
+                mask &= self._text(column, op, value)
+            else:
+                raise ValueError(f"Unknown filter operator: {op}")
+        return np.flatnonzero(mask)
+
+    def sort(self, rows, by=()):
+        """`rows` reordered by (column, ascending) keys, first key first; missing values last."""
+        if not by or not len(rows):
+            return rows
+        keys = [self._rank(column, ascending)[rows] for column, ascending in reversed(by)]
+        return rows[np.lexsort(keys)]
+
+    def rollup(self, rows, by, medians=ROLLUP_MEDIANS):
+        """Row count and medians of `medians` per `by` group over `rows`, largest groups first."""
+        names, codes, order, _ = self._postings[by]
+        picked = np.zeros(self.size, dtype=bool)
+        picked[rows] = True
+        grouped = order[picked[order]]
+        sizes = np.bincount(codes[rows], minlength=len(names) + 1)
+        bounds = np.cumsum(sizes)[:-1]
+        table = {by: ["(none)"] + names, "Count": sizes}
+        for col in medians:
+            if col not in self.frame.columns:
+                continue
+            parts = np.split(self._number(col)[grouped], bounds)
+            with np.errstate(all="ignore"):
+                table[f"Median {col}"] = [np.nan if np.isnan(p).all() else float(np.nanmedian(p)) for p in parts]
+        out = pd.DataFrame(table)
+        out = out[out["Count"] > 0]
+        return out.sort_values("Count", ascending=False, kind="stable", ignore_index=True)
+
+    def take(self, rows):
+        return self.frame.iloc[rows]
@@ -0,0 +1,86 @@
+"""Headless batch screener.
+
+Screens a ticker universe without the UI and writes the summary and
+deep-dive tables as Parquet snapshots the dashboard picks up:
+
+    python screener.py --tickers-file sgx_listings.csv --out .cache/snapshots --max-age 86400
+    python screener.py --tickers D05.SI O39.SI U11.SI
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import analysis
+import universe
+from concurrency import MessageLog
+
+CHUNK_SIZE = 25
+
+
+def read_universe(path):
+    """Tickers from a plain list (whitespace/comma separated) or a CSV with a Ticker/Symbol column."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        text = fh.read()
+    first_line = text.splitlines()[0] if text else ""
+    header = [h.strip().lower() for h in first_line.split(",")]
+    for column in ("ticker", "symbol"):
+        if column in header:
+            rows = csv.DictReader(text.splitlines())
+            key = rows.fieldnames[header.index(column)]
+            return [row[key].strip().upper() for row in rows if row[key].strip()]
+    return [t.upper() for t in text.replace(",", " ").split()]
+
+
+def screen_chunk(tickers):
+    """Runs in a worker process: summary table, deep-dive table and messages for one chunk."""
+    messages = MessageLog()
+    summary = analysis.screen(tickers, messages)
+    deep = analysis.deep_dive(tickers, messages)
+    return summary, deep, list(messages)
+
+
+def run(tickers, out_dir=analysis.SNAPSHOT_DIR, processes=None, chunk_size=CHUNK_SIZE, log=sys.stderr,
+        max_age=None):
+    tickers = list(dict.fromkeys(tickers))
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    summary, deep = [], []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for summary_chunk, deep_chunk, messages in pool.map(screen_chunk, chunks):
+            summary.append(summary_chunk)
+            deep.append(deep_chunk)
+            for msg_type, msg_text in messages:
+                print(f"[{msg_type}] {msg_text}", file=log)
+
+    summary_df = universe.in_order(tickers, universe.SUMMARY_SCHEMA, *summary)
+    deep_df = universe.in_order(tickers, universe.DEEP_DIVE_SCHEMA, *deep)
+    analysis.write_snapshot(summary_df, deep_df, out_dir, max_age)
+    return summary_df, deep_df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen a ticker universe and write Parquet snapshots.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tickers", nargs="+", help="tickers to screen, e.g. D05.SI O39.SI")
+    source.add_argument("--tickers-file", help="ticker list or CSV with a Ticker/Symbol column")
+    parser.add_argument("--out", default=analysis.SNAPSHOT_DIR, help="snapshot directory (default: %(default)s)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="tickers per worker task")
+    parser.add_argument("--max-age", type=float,
+                        help="seconds the dashboard uses this snapshot for (default: SNAPSHOT_MAX_AGE, 900)")
+    args = parser.parse_args(argv)
+
+    tickers = [t.upper() for t in args.tickers] if args.tickers else read_universe(args.tickers_file)
+    started = time.time()
+    summary_df, deep_df = run(tickers, args.out, args.processes, args.chunk_size, max_age=args.max_age)
+    print(
+        f"Screened {len(tickers)} tickers in {time.time() - started:.1f}s: "
+        f"{len(summary_df)} summary rows, {len(deep_df)} deep-dive rows -> {args.out}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Headline sentiment with memoized VADER scores and per-ticker history.
+
+Compound scores are stored once per normalized headline, so only headlines
+we have never seen before go through VADER. Each ticker's average score is
+logged over time, which gives the dashboard a trend next to the label.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+STORE_PATH = os.environ.get(
+    "SENTIMENT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "sentiment.sqlite"),
+)
+HEADLINES_PER_TICKER = 10
+HISTORY_INTERVAL = 60 * 60  # log an unchanged score at most hourly
+TREND_WINDOW = 7 * 24 * 60 * 60
+TREND_THRESHOLD = 0.05
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analyzer():
+    """Process-wide VADER analyzer; the lexicon is loaded once."""
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+            _analyzer = SentimentIntensityAnalyzer()
+        return _analyzer
+
+
+def headline_key(text):
+    return hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def label_for(score):
+    if score > 0.2:
+        return "Bullish"
+    elif score < -0.2:
+        return "Bearish"
+    else:
+        return "Neutral"
+
+
+def trend_for(delta):
+    if delta is None:
+        return "New"
+    if delta > TREND_THRESHOLD:
+        return "↑ Improving"
+    elif delta < -TREND_THRESHOLD:
+        return "↓ Weakening"
+    else:
+        return "→ Steady"
+
+
+class HeadlineStore:
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._scores = {}  # headline key -> compound
+        self._last = {}  # ticker -> (observed_at, score)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS headlines (key TEXT PRIMARY KEY, text TEXT, compound REAL NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ticker_sentiment ("
+                "ticker TEXT, observed_at REAL, score REAL NOT NULL, PRIMARY KEY (ticker, observed_at))"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return closing(conn)
+
+    def scores(self, headlines):
+        """Compound score per headline, scoring only the ones not seen before."""
+        keys = [headline_key(h) for h in headlines]
+        with self._lock:
+            missing = [k for k in dict.fromkeys(keys) if k not in self._scores]
+        if missing:
+            with self._connect() as conn:
+                marks = ",".join("?" * len(missing))
+                found = dict(conn.execute(f"SELECT key, compound FROM headlines WHERE key IN ({marks})", missing))
+            new = [(k, h) for k, h in dict(zip(keys, headlines)).items() if k in missing and k not in found]
+            if new:
+                analyzer = get_analyzer()
+                rows = [(k, h, analyzer.polarity_scores(h)["compound"]) for k, h in new]
+                with self._connect() as conn, conn:
+                    conn.executemany("INSERT OR REPLACE INTO headlines VALUES (?, ?, ?)", rows)
+                found.update({k: score for k, _, score in rows})
+            with self._lock:
+                self._scores.update(found)
+        with self._lock:
+            return [self._scores[k] for k in keys]
+
+    def record(self, ticker, score, now=None):
+        now = time.time() if now is None else now
+        last = self._last_observation(ticker)
+        if last and last[1] == score and now - last[0] < HISTORY_INTERVAL:
+            return
+        with self._connect() as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO ticker_sentiment VALUES (?, ?, ?)", (ticker, now, score))
+        with self._lock:
+            self._last[ticker] = (now, score)
+
+    def _last_observation(self, ticker):
+        with self._lock:
+            if ticker in self._last:
+                return self._last[ticker]
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT observed_at, score FROM ticker_sentiment WHERE ticker = ? ORDER BY observed_at DESC LIMIT 1",
+                (ticker,),
+            ).fetchone()
+        with self._lock:
+            self._last[ticker] = row
+        return row
+
+    def history(self, ticker, since=None):
+        since = time.time() - TREND_WINDOW if since is None else since
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT observed_at, score FROM ticker_sentiment WHERE ticker = ? AND observed_at >= ? ORDER BY observed_at",
+                (ticker, since),
+            ).fetchall()
+
+    def assess(self, ticker, headlines):
+        """Current score, Bullish/Bearish/Neutral label and trend against the last week."""
+        scores = self.scores(headlines[:HEADLINES_PER_TICKER])
+        score = sum(scores) / len(scores) if scores else 0
+        past = self.history(ticker)
+        self.record(ticker, score)
+        delta = score - past[0][1] if past else None
+        return {"score": score, "label": label_for(score), "trend": trend_for(delta)}
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = HeadlineStore()
+        return _default
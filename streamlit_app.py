@@ -1,11 +1,16 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
 from datetime import datetime, timedelta
+import os
 import re
-import requests
-from bs4 import BeautifulSoup
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import threading
+import time
+
+# ⚡ Only light modules up here: pandas, yfinance, bs4, requests and VADER
+# load after login (see load_engine), so the login form renders on a cold
+# worker without paying for them.
+import metrics
+from concurrency import MessageLog
+from presets import PRESETS
 
 st.set_page_config(page_title="Stock Analysis App", layout="wide")
 
@@ -22,11 +27,157 @@ hide_streamlit_style = """
 
 st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 
+# 🔥 Keep the preset watchlists warm in the background (once per process, started after login)
+@st.cache_resource
+def start_preset_warmup():
+    # warmup pulls in the whole engine, so it is imported on its own thread
+    # instead of in front of the first dashboard render.
+    stop = threading.Event()
+
+    def run():
+        import warmup
+        warmup.run_forever(stop=stop)
+
+    threading.Thread(target=run, name="preset-warmup", daemon=True).start()
+    return stop
+
+
+# 🧰 Engine modules and the process-wide market data cache, loaded once per process
+@st.cache_resource(show_spinner="Loading market data…")
+def load_engine():
+    import analysis
+    import market_data
+
+    market_data.default_cache()
+    if os.environ.get("WARMUP_ENABLED", "1") == "1":
+        start_preset_warmup()
+    return analysis
+
+
+# 🎯 Target prices for every year window of the charted ticker, shared by the year buttons
+@st.cache_data(ttl=30 * 60, show_spinner=False)  # market_data.HISTORY_TAIL_TTL
+def load_window_targets(ticker):
+    import targets
+
+    return targets.load_window_targets([ticker])
+
+
+# 🧪 Target-price signal backtest over every cached trading day
+@st.cache_data(ttl=30 * 60, show_spinner=False)  # market_data.HISTORY_TAIL_TTL
+def load_backtest(tickers, years):
+    import backtest
+
+    return backtest.load_backtest(list(tickers), years=years)
+
+
+# 🔎 Query panel: filter / sort / group reruns only this fragment, reusing the tables' indexes
+@st.fragment
+def query_panel(tables):
+    import pandas as pd
+    import query
+    import styling
+
+    name = st.radio("Table", list(tables), horizontal=True, key="query_table")
+    index, style = tables[name]
+    filters = []
+
+    grouping = index.indexed_columns()
+    if grouping:
+        for col, column in zip(st.columns(len(grouping)), grouping):
+            picked = col.multiselect(column, [c for c, _ in index.categories(column)], key=f"query_{name}_{column}")
+            if picked:
+                filters.append((column, "in", picked))
+    text_cols = st.columns([1, 3])
+    suffix = text_cols[0].text_input("Ticker ends with", placeholder=".SI", key=f"query_{name}_suffix")
+    if suffix.strip():
+        filters.append(("Ticker", "endswith", suffix.strip()))
+    name_part = text_cols[1].text_input("Name contains", key=f"query_{name}_name")
+    if name_part.strip():
+        filters.append(("Name", "contains", name_part.strip()))
+
+    numeric = index.numeric_columns()
+    conditions = st.data_editor(
+        pd.DataFrame({"Column": pd.Series(dtype=str), "Op": pd.Series(dtype=str), "Value": pd.Series(dtype=str)}),
+        num_rows="dynamic",
+        hide_index=True,
+        column_config={
+            "Column": st.column_config.SelectboxColumn(options=numeric, required=True),
+            "Op": st.column_config.SelectboxColumn(options=list(query.COMPARISONS), default="<", required=True),
+            "Value": st.column_config.TextColumn(help="A number, or another column's name (e.g. Target Price (Actual))"),
+        },
+        key=f"query_{name}_conditions",
+    )
+    for column, op, value in conditions.itertuples(index=False):
+        if not column or not op or value is None or not str(value).strip():
+            continue
+        value = str(value).strip()
+        try:
+            filters.append((column, op, float(value.rstrip("%"))))
+        except ValueError:
+            if value not in numeric:
+                st.warning(f"⚠️ Ignoring `{column} {op} {value}`: not a number or numeric column.")
+                continue
+            filters.append((column, op, value))
+
+    query_cols = st.columns([3, 1])
+    sort_keys = query_cols[0].multiselect(
+        "Sort by (first is primary)", [f"{c} {arrow}" for c in index.frame.columns for arrow in ("↑", "↓")],
+        key=f"query_{name}_sort",
+    )
+    group_by = query_cols[1].selectbox("Group by", ["None"] + grouping, key=f"query_{name}_group")
+
+    started = time.perf_counter()
+    with metrics.span("compute.query"):
+        rows = index.select(filters)
+        rows = index.sort(rows, [(key[:-2], key.endswith("↑")) for key in sort_keys])
+    st.caption(f"{len(rows):,} of {index.size:,} rows match ({(time.perf_counter() - started) * 1000:.1f} ms)")
+
+    if group_by != "None":
+        st.dataframe(styling.style_rollup(index.rollup(rows, group_by)), hide_index=True)
+
+    # Only the page on screen is sliced out, styled and sent
+    page = 1
+    if len(rows) > styling.PAGE_SIZE:
+        pages = -(-len(rows) // styling.PAGE_SIZE)
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1,
+                               key=f"query_{name}_page")
+    shown = rows[(page - 1) * styling.PAGE_SIZE:page * styling.PAGE_SIZE]
+    st.dataframe(style(index.take(shown)), hide_index=True)
+
+
+# 📡 Live monitor, re-run on its own timer without rerunning the page
+def monitor_panel(tickers, years):
+    import pandas as pd
+    import monitor
+    import styling
+
+    key = (tuple(tickers), years)
+    if st.session_state.get("monitor_key") != key:
+        st.session_state["monitor"] = monitor.Monitor(tickers, years=years)
+        st.session_state["monitor_key"] = key
+    watch = st.session_state["monitor"]
+    with metrics.span("monitor.tick"):
+        raised = watch.tick()
+    for alert in raised:
+        st.toast(f"{alert['Ticker']} crossed the {alert['Crossed']} at {alert['Price']:.2f} ({alert['To']})", icon="🔔")
+    st.caption(f"Tick {watch.ticks} at {datetime.now():%H:%M:%S}: {watch.last_changed} of "
+               f"{len(watch.tickers)} tickers changed")
+    st.dataframe(styling.style_monitor(watch.table()), hide_index=True)
+    if watch.alerts:
+        with st.expander(f"🔔 Alerts ({len(watch.alerts)})"):
+            st.dataframe(pd.DataFrame(list(watch.alerts)), hide_index=True)
+
+
 # 🛡️ Session state
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 if "login_success" not in st.session_state:
     st.session_state.login_success = False
+if "is_admin" not in st.session_state:
+    st.session_state.is_admin = False
+
+# 🛠️ Passwords that also unlock the rerun metrics panel (comma-separated)
+ADMIN_PASSWORDS = [p for p in os.environ.get("ADMIN_PASSWORDS", "").split(",") if p]
 
 # 🔐 Login
 if not st.session_state.logged_in:
@@ -37,519 +188,521 @@ if not st.session_state.logged_in:
             password = st.text_input("Password", type="password")
             submitted = st.form_submit_button("Login")
             if submitted:
-                if password in ["Password123", "Pei1234!"]:
+                if password in ["Password123", "Pei1234!"] + ADMIN_PASSWORDS:
                     st.session_state.logged_in = True
                     st.session_state.login_success = True
+                    st.session_state.is_admin = password in ADMIN_PASSWORDS
                 else:
                     st.error("Invalid credentials.")
 
 # ✅ Main App
 if st.session_state.logged_in:
-    if st.session_state.login_success:
-        st.success("Login successful! 🎉")
-        st.session_state.login_success = False
-
-    st.markdown("## 📊 Stock Analysis Dashboard")
+    rerun_metrics = metrics.start_rerun()
+    try:
+        load_engine()
+        import pandas as pd
+        import analysis
+        import exports
+        import market_data
+        import styling
+        import symbols
+        import universe
+        import warmup
+
+        if st.session_state.login_success:
+            st.success("Login successful! 🎉")
+            st.session_state.login_success = False
+
+        st.markdown("## 📊 Stock Analysis Dashboard")
     
-    hide_textinput = False
-
-    if "raw_input" not in st.session_state:
-        st.session_state["raw_input"] = ""
-
-    # Define default input
-    default_input = ""
-
-    with st.container(border=True):
-        cols = st.columns(4)
-
-        with cols[0]:
-            if st.button("📥 Pei Stocks"):
-                reits = [
-                    "F9D.si", "C38U.si", "9CI.si", "C52.si", "TCU.si", "P34.si", "F99.si", "H02.si", "H13.si", "H78.si",
-                    "C07.si", "J36.si", "CJLU.si", "Q01.si", "S61.si", "OV8.si", "S68.si", "S63.si", "Y92.si", "AGS.si",
-                    "WJP.si", "F34.si", "BSL.si"
-                ]
-                st.session_state["raw_input"] = " ".join(reits)
-
-        with cols[1]:
-            if st.button("📥 Jay Stocks"):
-                reits = [
-                    "TGT", "GOOGL", "GRAB", "TSLA", "DIS"
-                ]
-                st.session_state["raw_input"] = " ".join(reits)
-
-        with cols[2]:
-            if st.button("📥 SG Banks"):
-                reits = [
-                    "U11.SI", "D05.SI", "O39.SI", "YF8.SI", "AIY.SI", "CHJ.SI", "S41.SI", "S23.SI", "TCU.SI", "G50.SI"
-                ]
-                st.session_state["raw_input"] = " ".join(reits)
-
-    # Use default_input only if it's set by the button
-    raw_input = st.text_input(
-        "Enter stock tickers (e.g., AAPL MSFT, KO, D05.SI)",
-        value=st.session_state["raw_input"]
-    )
-
-    tickers = re.split(r'[,\s]+', raw_input.upper().strip())
-    tickers = [t for t in tickers if t]
-
-    messages = []
-    analyzer = SentimentIntensityAnalyzer()
-
-    def get_dividend_payout(ticker, low_date):
-        start = low_date - timedelta(days=365)
-        end = low_date
-        hist = yf.Ticker(ticker).dividends
-        payout = hist[(hist.index >= start) & (hist.index <= end)].sum()
-        return payout
-
-    def get_eps_metrics(stock):
-        info = stock.info
-        eps_data = {}
-        try:
-            eps_data["Trailing EPS"] = round(info.get("trailingEps", 0), 2)
-            eps_data["Forward EPS"] = round(info.get("forwardEps", 0), 2)
-            eps_data["PE Ratio"] = round(info.get("trailingPE", 0), 2)
-            eps_data["PEG Ratio"] = round(info.get("pegRatio", 0), 2)
-        except:
-            pass
-        return eps_data
-
-    def get_sentiment(ticker):
-        try:
-            url = f"https://finviz.com/quote.ashx?t={ticker}"
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            soup = BeautifulSoup(requests.get(url, headers=headers).content, "html.parser")
-            news_table = soup.find(id='news-table')
-            headlines = [row.a.text for row in news_table.findAll('tr') if row.a]
-            scores = [analyzer.polarity_scores(h)['compound'] for h in headlines[:10]]
-            avg_score = sum(scores) / len(scores) if scores else 0
-            if avg_score > 0.2:
-                return "Bullish"
-            elif avg_score < -0.2:
-                return "Bearish"
-            else:
-                return "Neutral"
-        except:
-            return "Unknown"
-
-    def analyze_ticker(ticker):
-        ticker = ticker.strip()
-        if not re.match(r'^[A-Z0-9\-\.]+$', ticker):
-            messages.append(("warning", f"⚠️ Invalid ticker: {ticker}"))
-            return None
-
-        try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            if not info or "currentPrice" not in info:
-                messages.append(("warning", f"⚠️ No data for: {ticker}"))
-                return None
-
-            name = info.get("shortName", "N/A")
-            sector = info.get("sector", "N/A")
-            industry = info.get("industry", "N/A")
-            current_price = info.get("currentPrice", 0)
-            dividend_yield = info.get("dividendYield", 0) or 0
-            high_52 = info.get("fiftyTwoWeekHigh", 0)
-            low_52 = info.get("fiftyTwoWeekLow", 0)
-            price_zone = ((current_price - low_52) / (high_52 - low_52)) * 100 if high_52 != low_52 else 0
-
-            hist = stock.history(period="5y")
-            if hist.empty:
-                messages.append(("warning", f"⚠️ No historical data for: {ticker}"))
-                return None
-
-            low_5y_price = hist["Close"].min()
-            low_5y_date = hist["Close"].idxmin()
-            payout_5y = get_dividend_payout(ticker, low_5y_date)
-            yield_5y = (payout_5y / low_5y_price) if low_5y_price else 0
-
-            target_actual = (current_price * (dividend_yield/100) / yield_5y) if yield_5y else 0
-
-            result = {
-                "Ticker": ticker,
-                "Name": name,
-                "Sector": sector,
-                "Industry": industry,
-                "Current Price": round(current_price, 2),
-                "Price Zone (%)": round(price_zone, 2),
-                "Dividend Yield (%)": round(dividend_yield, 2),
-                "52W High": round(high_52, 2),
-                "52W Low": round(low_52, 2),
-                "5Y Low Date": low_5y_date.date(),
-                "5Y Low Price": round(low_5y_price, 2),
-                "5Y Dividend Payout": round(payout_5y, 2),
-                "5Y Dividend Yield (%)": round(yield_5y, 2),
-                "Target Price (Actual)": round(target_actual, 2),
-                "Sentiment": get_sentiment(ticker)
-            }
-
-            result.update(get_eps_metrics(stock))
-            return result
-
-        except Exception as e:
-            messages.append(("error", f"❌ Error analyzing {ticker}: {e}"))
-            return None
-
-    def highlight_current_price(row):
-        try:
-            price = row["Current Price"]
-            target = row["Target Price (Actual)"]
-            if pd.isna(target) or target == 0:
-                return ''
-            elif price >= target:
-                return 'color: white; background-color: #800000'  # dark maroon
-            else:
-                return 'color: white; background-color: #006400'  # dark green
-        except KeyError:
-            return ''
-
-
-    def highlight_sentiment(val):
-        Sentiment = val.strip()
-        if Sentiment == "Bullish":
-            return 'color: white; background-color: #006400'  # dark green
-        elif Sentiment == "Bearish":
-            return 'color: white; background-color: #800000'  # dark maroon
-        else:
-            return ''   
-
-    if tickers:
-        results = [r for t in tickers if (r := analyze_ticker(t)) is not None]
-        df = pd.DataFrame(results)
-
-        desired_order = [
-            "Ticker", "Name",  "Sector", "Industry",  "Current Price", "Sentiment", "Trailing EPS", "Forward EPS", 
-            "Dividend Yield (%)", "5Y Low Date", "5Y Low Price", "5Y Dividend Payout", "5Y Dividend Yield (%)",
-            "PE Ratio", "PEG Ratio", "Price Zone (%)", "Target Price (Actual)"
-        ]
-        df = df[desired_order]
-
-        if "Target Price (Actual)" not in df.columns:
-            df["Target Price (Actual)"] = 0.0
-
-        styled_df = df.style \
-            .format({
-                "Current Price": "{:.2f}",
-                "5Y Low Price": "{:.2f}",
-                "5Y Dividend Payout": "{:.2f}",
-                "Target Price (Actual)": "{:.2f}",
-                "Trailing EPS": "{:.2f}",
-                "Forward EPS": "{:.2f}",
-                "PE Ratio": "{:.2f}",
-                "PEG Ratio": "{:.2f}",
-                "Dividend Yield (%)": "{:.2f}%",
-                "5Y Dividend Yield (%)": "{:.2f}%",
-                "Price Zone (%)": "{:.2f}%"
-            }) \
-            .map(highlight_sentiment, subset=["Sentiment"]) \
-            .map(lambda val: highlight_current_price(df.loc[df["Current Price"] == val].iloc[0]), subset=["Current Price"])
-
-        st.markdown("##### 🗄️ Export Database")
-
-        st.dataframe(styled_df, hide_index=True)
-
-        if messages:
-            st.markdown("---")
-            for msg_type, msg_text in messages:
-                if msg_type == "warning":
-                    st.warning(msg_text)
-                elif msg_type == "error":
-                    st.error(msg_text)
-
-    toggle_chart = st.toggle("Activate Chart Analysis?", value=True)
-
-    # 📈 Enhanced Price Tracker
-    if toggle_chart:
-        if not len(tickers) == 0:
-            st.markdown("#### 📈 Chart Analysis")
+        hide_textinput = False
+
+        if "raw_input" not in st.session_state:
+            st.session_state["raw_input"] = ""
+
+        # Define default input
+        default_input = ""
+
+        with st.container(border=True):
+            cols = st.columns(4)
+
+            for col, (name, preset) in zip(cols, PRESETS.items()):
+                with col:
+                    if st.button(f"📥 {name}"):
+                        st.session_state["raw_input"] = " ".join(preset)
+
+            with cols[3]:
+                refreshed = [entry["refreshed_at"] for entry in warmup.read_status().values() if "refreshed_at" in entry]
+                if refreshed:
+                    st.caption(f"🔥 Presets warmed {datetime.fromtimestamp(max(refreshed)).strftime('%H:%M:%S')}")
+
+        # Use default_input only if it's set by the button
+        raw_input = st.text_input(
+            "Enter stock tickers (e.g., AAPL MSFT, KO, D05.SI)",
+            value=st.session_state["raw_input"]
+        )
+
+        # 🔤 Checked and normalised against the local listing before anything is fetched
+        symbol_index = symbols.default_index()
+        tickers, rejected, rewritten = symbol_index.check(re.split(r'[,\s]+', raw_input.strip()))
+        if rejected:
+            st.warning("⚠️ Skipped: " + "; ".join(reason for _, reason in rejected))
+        if rewritten:
+            st.caption("🔤 Read as: " + ", ".join(f"{raw} → {symbol}" for raw, symbol in rewritten))
+        rerun_metrics.tickers = len(tickers)
+        rerun_metrics.watchlist = next(
+            (name for name, preset in PRESETS.items() if set(map(symbol_index.normalize, preset)) == set(tickers)),
+            "custom",
+        )
+
+        # 🔍 Symbol lookup; a pick is appended to the ticker list
+        lookup = st.text_input("🔍 Look up a symbol or company", placeholder="e.g. DBS, CapitaLand, S6",
+                               key="symbol_lookup")
+        matches = symbol_index.search(lookup)
+        if matches:
+            for col, (symbol, name) in zip(st.columns(len(matches)), matches):
+                if col.button(f"➕ {symbol}", help=name or None, key=f"pick_{symbol}", width="stretch"):
+                    st.session_state["raw_input"] = f"{raw_input.strip()} {symbol}".strip()
+                    st.rerun()
+        elif lookup.strip():
+            st.caption("No listed symbol or company matches.")
+
+        messages = MessageLog()
+        stream_results = st.toggle("⚡ Stream results", value=True, key="stream_results",
+                                   help="Show rows as tickers finish instead of waiting for the whole list")
+
+        if tickers:
+            # 💾 Reuse rows from a fresh precomputed snapshot; screen only the rest
+            with metrics.span("fetch.snapshots"):
+                snapshot = analysis.load_snapshots()
+            snapshot_summary = snapshot[0] if snapshot else None
+            snapshot_deep = snapshot[1] if snapshot else None
+            known = set(snapshot_summary["Ticker"]) if snapshot else set()
+            todo = [t for t in tickers if t not in known]
+
+            # 🌊 Rows arrive as tickers finish; each section below draws from what has arrived so far
+            yield_histories = {}
+            finished, summary_rows, deep_rows = [], [], []
+            want_deep = st.session_state.get("toggle_yield", True)
+            stream = analysis.screen_stream(todo, messages, yield_histories, deep=want_deep)
+            live_slots = {}
+
+            def current_summary():
+                done = universe.from_rows(summary_rows, universe.SUMMARY_SCHEMA)
+                return universe.in_order(tickers, universe.SUMMARY_SCHEMA, snapshot_summary, done)
+
+            def current_deep():
+                done = universe.from_rows(deep_rows, universe.DEEP_DIVE_SCHEMA)
+                return universe.in_order(tickers, universe.DEEP_DIVE_SCHEMA, snapshot_deep, done)
+
+            def draw_live():
+                done = len(finished)
+                live_slots["progress"].progress(done / len(todo), text=f"⏳ Screened {done} of {len(todo)}")
+                summary_page = styling.page_slice(current_summary(), 1)
+                live_slots["summary"].dataframe(styling.style_table(summary_page), hide_index=True)
+                if "deep" in live_slots:
+                    deep_page = styling.page_slice(current_deep(), 1)
+                    live_slots["deep"].dataframe(styling.style_deep_dive(deep_page), hide_index=True)
+
+            def pull(until=None):
+                """Advance the stream until `until` tickers are done (or it runs dry), redrawing as rows land."""
+                last_draw = time.monotonic()
+                with metrics.span("compute.stream"):
+                    for ticker, row, deep_row in stream:
+                        finished.append(ticker)
+                        if row:
+                            summary_rows.append(row)
+                        if deep_row:
+                            deep_rows.append(deep_row)
+                        if stream_results and time.monotonic() - last_draw > 0.5:
+                            draw_live()
+                            last_draw = time.monotonic()
+                        if until is not None and len(finished) >= until:
+                            break
+                if stream_results and todo:
+                    draw_live()
+
+            st.markdown("##### 🗄️ Export Database")
+            export_box = st.container()
+
+            # 🔃 Sorted over the whole table, before paging
+            sort_cols = st.columns([3, 1])
+            sort_by = sort_cols[0].selectbox("Sort by", ["Input order"] + list(universe.SUMMARY_SCHEMA), key="sort_by")
+            descending = sort_cols[1].toggle("Descending", key="sort_desc")
+
+            page_slot = st.empty()
+            live_slots["summary"] = st.empty()
+            live_slots["progress"] = st.empty()
+            messages_box = st.container()
+
+            # First chunk only while streaming, so the chart can start on finished tickers
+            pull(until=analysis.STREAM_FIRST_CHUNK if stream_results else None)
+            df = current_summary()
+
+        # 📡 Live Monitor
+        toggle_monitor = st.toggle("Activate Live Monitor?", value=False, key="toggle_monitor")
+        if toggle_monitor and tickers:
+            import monitor
+
+            st.markdown("##### 📡 Live Monitor")
+            monitor_cols = st.columns(2)
+            interval = monitor_cols[0].selectbox("Poll every", list(monitor.INTERVALS), key="monitor_interval")
+            monitor_years = monitor_cols[1].select_slider("Low window (years)", options=[1, 2, 3, 4, 5], value=5,
+                                                          key="monitor_years")
+            st.fragment(run_every=monitor.INTERVALS[interval])(monitor_panel)(tickers, monitor_years)
+
+        toggle_chart = st.toggle("Activate Chart Analysis?", value=True)
+
+        # 📈 Enhanced Price Tracker
+        if toggle_chart:
+            if tickers:
+                st.markdown("#### 📈 Chart Analysis")
             
-            # 🧠 Initialize session state keys at the top of your script
-            if "selected_ticker" not in st.session_state:
-                st.session_state["selected_ticker"] = None
-            if "ticker_trigger" not in st.session_state:
-                st.session_state["ticker_trigger"] = False
-
-            # 📊 Ticker selection logic
-            ticker_list = df["Ticker"].tolist()
-            selected_ticker = ticker_list[0] if ticker_list else None  # fallback default
-
-            if len(ticker_list) > 20:
-                selected = st.selectbox("Select a ticker to view chart", ticker_list)
-                st.session_state["selected_ticker"] = selected
-                st.session_state["ticker_trigger"] = True
-            else:
-                num_cols = 5
-                rows = (len(ticker_list) + num_cols - 1) // num_cols
-                for row in range(rows):
-                    cols = st.columns(num_cols)
-                    for i in range(num_cols):
-                        idx = row * num_cols + i
-                        if idx < len(ticker_list):
-                            ticker = ticker_list[idx]
-                            if cols[i].button(ticker, key=f"btn_{ticker}"):
-                                st.session_state["selected_ticker"] = ticker
-                                st.session_state["ticker_trigger"] = True
-
-            # ✅ Finalize selection using the trigger
-            if st.session_state["ticker_trigger"]:
-                selected_ticker = st.session_state["selected_ticker"]
-                st.session_state["ticker_trigger"] = False  # reset trigger
-            else:
-                selected_ticker = st.session_state["selected_ticker"] or ticker_list[0]
-
-            # 📦 Container 2: Year Toggle + Chart
-            with st.container(border=True):
-                st.markdown("##### 📈 Price Range Tracker")
-
-                layout = st.columns([1, 4])  # col0 = year toggle, col1 = chart
-
-                # ⏳ Year Toggle in col0
-                with layout[0]:
-                    # st.markdown("###### Period")
-                    st.markdown("######")
-                    year_range = 3  # default
-                    year_buttons = [1, 2, 3, 4, 5]
-
-                    for yr in year_buttons:
-                        if st.button(f"{yr} Year{'s' if yr > 1 else ''}"):
-                            year_range = yr
-
-
-                # 📊 Chart + Analysis
-                with layout[1]:
-                    import plotly.graph_objects as go
-
-                    stock = yf.Ticker(selected_ticker)
-                    current_price = stock.info.get("currentPrice", None)
-                    company_name = stock.info.get("shortName", "Unknown Company")
-                    end_date = datetime.today().replace(tzinfo=None)
-                    start_date = end_date - timedelta(days=365 * year_range)
-                    hist = stock.history(start=start_date, end=end_date)
-
-                    if not hist.empty:
-                        # 🧮 Monthly high/low
-                        monthly = hist.resample("M").agg({"Low": "min", "High": "max"}).dropna()
-
-                        # 📊 Daily close
-                        daily_close = hist[["Close"]].copy()
-                        daily_close.rename(columns={"Close": "Daily Close"}, inplace=True)
-
-                        # 🧩 Merge monthly high/low into daily timeline
-                        monthly["Date"] = monthly.index
-                        monthly = monthly.set_index(monthly["Date"].dt.to_period("M"))
-                        daily_close["Month"] = daily_close.index.to_period("M")
-                        daily_close["Monthly Low"] = daily_close["Month"].map(monthly["Low"])
-                        daily_close["Monthly High"] = daily_close["Month"].map(monthly["High"])
-                        daily_close.drop(columns=["Month"], inplace=True)
-
-                        # 📈 Trend Summary
-                        start_price = daily_close["Daily Close"].iloc[0]
-                        end_price = daily_close["Daily Close"].iloc[-1]
-                        pct_change = ((end_price - start_price) / start_price) * 100
-
-                        if pct_change > 5:
-                            trend = "📈 Upward"
-                        elif pct_change < -5:
-                            trend = "📉 Downward"
-                        else:
-                            trend = "➖ Stable"
-
-                        # 📐 Year-Specific Dividend-Based Target Price
-                        dividends = stock.dividends
-                        if dividends.index.tz is not None:
-                            dividends.index = dividends.index.tz_convert(None)
-
-                        target_prices = []
-                        analysis_start = end_date - timedelta(days=365 * year_range)
-                        daily_close.index = daily_close.index.tz_convert(None)
-                        analysis_data = daily_close[(daily_close.index >= analysis_start) & (daily_close.index <= end_date)]
-
-                        if not analysis_data.empty:
-                            low_price = analysis_data["Daily Close"].min()
-                            low_date = analysis_data["Daily Close"].idxmin()
-                            if low_date.tzinfo is not None:
-                                low_date = low_date.replace(tzinfo=None)
-
-                            payout_window_start = low_date - timedelta(days=366)
-                            payout_window_end = low_date
-                            payouts = dividends[(dividends.index >= payout_window_start) & (dividends.index <= payout_window_end)]
-                            total_payout = payouts.sum()
-                            total_payout_yield = total_payout / low_price
+                # 🧠 Initialize session state keys at the top of your script
+                if "selected_ticker" not in st.session_state:
+                    st.session_state["selected_ticker"] = None
+                if "ticker_trigger" not in st.session_state:
+                    st.session_state["ticker_trigger"] = False
+
+                # 📊 Ticker selection logic (the whole input, not just the rows streamed in so far)
+                ticker_list = list(tickers)
+                selected_ticker = ticker_list[0] if ticker_list else None  # fallback default
+
+                if len(ticker_list) > 20:
+                    selected = st.selectbox("Select a ticker to view chart", ticker_list)
+                    st.session_state["selected_ticker"] = selected
+                    st.session_state["ticker_trigger"] = True
+                else:
+                    num_cols = 5
+                    rows = (len(ticker_list) + num_cols - 1) // num_cols
+                    for row in range(rows):
+                        cols = st.columns(num_cols)
+                        for i in range(num_cols):
+                            idx = row * num_cols + i
+                            if idx < len(ticker_list):
+                                ticker = ticker_list[idx]
+                                if cols[i].button(ticker, key=f"btn_{ticker}"):
+                                    st.session_state["selected_ticker"] = ticker
+                                    st.session_state["ticker_trigger"] = True
+
+                # ✅ Finalize selection using the trigger
+                if st.session_state["ticker_trigger"]:
+                    selected_ticker = st.session_state["selected_ticker"]
+                    st.session_state["ticker_trigger"] = False  # reset trigger
+                else:
+                    selected_ticker = st.session_state["selected_ticker"] or ticker_list[0]
+
+                # 📦 Container 2: Year Toggle + Chart
+                with st.container(border=True):
+                    st.markdown("##### 📈 Price Range Tracker")
+
+                    layout = st.columns([1, 4])  # col0 = year toggle, col1 = chart
+
+                    # ⏳ Year Toggle in col0
+                    with layout[0]:
+                        # st.markdown("###### Period")
+                        st.markdown("######")
+                        year_range = 3  # default
+                        year_buttons = [1, 2, 3, 4, 5]
+
+                        for yr in year_buttons:
+                            if st.button(f"{yr} Year{'s' if yr > 1 else ''}"):
+                                year_range = yr
+
+                        fast_chart = st.toggle("⚡ Fast chart", value=True, help="WebGL, downsampled close, monthly steps")
+
+
+                    # 📊 Chart + Analysis
+                    with layout[1]:
+                        import plotly.graph_objects as go
+                        import charts
+
+                        with metrics.span("fetch.chart_history"):
+                            stock = market_data.Ticker(selected_ticker)
+                            current_price = stock.info.get("currentPrice", None)
+                            company_name = stock.info.get("shortName", "Unknown Company")
+                            end_date = datetime.today().replace(tzinfo=None)
+                            start_date = end_date - timedelta(days=365 * year_range)
+                            hist = stock.history(start=start_date, end=end_date)
+
+                        if not hist.empty:
+                            # 🧮 Monthly high/low
+                            monthly = hist.resample("ME").agg({"Low": "min", "High": "max"}).dropna()
+
+                            # 📊 Daily close
+                            daily_close = hist[["Close"]].copy()
+                            daily_close.rename(columns={"Close": "Daily Close"}, inplace=True)
+
+                            # 🧩 Merge monthly high/low into daily timeline
+                            monthly["Date"] = monthly.index
+                            monthly = monthly.set_index(monthly["Date"].dt.to_period("M"))
+                            daily_close["Month"] = daily_close.index.to_period("M")
+                            daily_close["Monthly Low"] = daily_close["Month"].map(monthly["Low"])
+                            daily_close["Monthly High"] = daily_close["Month"].map(monthly["High"])
+                            daily_close.drop(columns=["Month"], inplace=True)
+
+                            # 📈 Trend Summary
+                            start_price = daily_close["Daily Close"].iloc[0]
+                            end_price = daily_close["Daily Close"].iloc[-1]
+                            pct_change = ((end_price - start_price) / start_price) * 100
+
+                            if pct_change > 5:
+                                trend = "📈 Upward"
+                            elif pct_change < -5:
+                                trend = "📉 Downward"
+                            else:
+                                trend = "➖ Stable"
+
+                            # 📐 Year-Specific Dividend-Based Target Price (every window precomputed, so this is a lookup)
+                            target_prices = []
+                            # Only the charted ticker: the rest of the list may still be streaming in.
+                            with metrics.span("compute.window_targets"):
+                                window_table = load_window_targets(selected_ticker)
 
                             div_yield = stock.info.get("dividendYield", 0) or 0
-                            target_price = (current_price * (div_yield / 100)) / total_payout_yield if div_yield else 0
-                            target_prices.append((low_date.year, target_price))
-
-                            safe_zone_90 = (current_price * (div_yield / 100)) / (total_payout_yield * 0.9) if div_yield else 0
-                            safe_zone_80 = (current_price * (div_yield / 100)) / (total_payout_yield * 0.8) if div_yield else 0
-
-                        # 🧾 Display Summary
-                        if target_prices:
-                            year_used, latest_target = target_prices[-1]
-                        # 📈 Plotly Chart
-                        fig = go.Figure()
-                        fig.add_trace(go.Scatter(x=daily_close.index, y=daily_close["Daily Close"], mode='lines', name='Daily Close'))
-                        fig.add_trace(go.Scatter(x=daily_close.index, y=daily_close["Monthly High"], mode='lines', name='Monthly High', line=dict(dash='dash')))
-                        fig.add_trace(go.Scatter(x=daily_close.index, y=daily_close["Monthly Low"], mode='lines', name='Monthly Low', line=dict(dash='dash')))
-
-                        if target_prices and latest_target > 0:
-                            fig.add_hline(
-                                y=latest_target,
-                                line=dict(color="green", dash="dot")
-                            )
-
-                            fig.add_hline(
-                                y=safe_zone_90,
-                                line=dict(color="purple", dash="dot")
-                            )
-
-                            fig.add_hline(
-                                y=safe_zone_80,
-                                line=dict(color="red", dash="dot")
+                            has_window = False
+                            if (selected_ticker, year_range) in window_table.index:
+                                window = window_table.loc[(selected_ticker, year_range)]
+                                if not pd.isna(window["Low Price"]):
+                                    has_window = True
+                                    low_price = window["Low Price"]
+                                    low_date = window["Low Date"]
+                                    total_payout = window["Payout"]
+                                    total_payout_yield = window["Payout Yield"]
+
+                                    target_prices.append((low_date.year, window["Target Price"]))
+
+                                    safe_zone_90, safe_zone_80 = window["Safe Zone 90"], window["Safe Zone 80"]
+
+                            # 🧾 Display Summary
+                            if target_prices:
+                                year_used, latest_target = target_prices[-1]
+                            # 📈 Plotly Chart
+                            fig = go.Figure()
+                            if fast_chart:
+                                fig.add_traces(charts.price_range_traces(hist))
+                            else:
+                                fig.add_trace(go.Scatter(x=daily_close.index, y=daily_close["Daily Close"], mode='lines', name='Daily Close'))
+                                fig.add_trace(go.Scatter(x=daily_close.index, y=daily_close["Monthly High"], mode='lines', name='Monthly High', line=dict(dash='dash')))
+                                fig.add_trace(go.Scatter(x=daily_close.index, y=daily_close["Monthly Low"], mode='lines', name='Monthly Low', line=dict(dash='dash')))
+
+                            if target_prices and latest_target > 0:
+                                fig.add_hline(
+                                    y=latest_target,
+                                    line=dict(color="green", dash="dot")
+                                )
+
+                                fig.add_hline(
+                                    y=safe_zone_90,
+                                    line=dict(color="purple", dash="dot")
+                                )
+
+                                fig.add_hline(
+                                    y=safe_zone_80,
+                                    line=dict(color="red", dash="dot")
+                                )
+
+                                fig.add_annotation(
+                                    text=f"🎯 Target Price ({year_used}): ${latest_target:.2f}",
+                                    xref="paper", yref="paper",
+                                    x=0, y=-0.01,
+                                    showarrow=False,
+                                    font=dict(color="limegreen", size=12),
+                                    align="left",
+                                    bgcolor="rgba(0,128,0,0.15)",
+                                    bordercolor="green",
+                                    borderwidth=1
+                                )
+
+                                # 🟪 Safe Zone 90% (Purple)
+                                fig.add_annotation(
+                                    text=f"Safe: ${safe_zone_90:.2f}",
+                                    xref="paper", yref="paper",
+                                    x=0.6, y=-0.01,
+                                    showarrow=False,
+                                    font=dict(color="purple", size=12),
+                                    align="left",
+                                    bgcolor="rgba(128,0,128,0.15)",
+                                    bordercolor="purple",
+                                    borderwidth=1
+                                )
+
+                                # 🟥 Safe Zone 80% (Red)
+                                fig.add_annotation(
+                                    text=f"Moderate: ${safe_zone_80:.2f}",
+                                    xref="paper", yref="paper",
+                                    x=1, y=-0.01,
+                                    showarrow=False,
+                                    font=dict(color="red", size=12),
+                                    align="left",
+                                    bgcolor="rgba(255,0,0,0.15)",
+                                    bordercolor="red",
+                                    borderwidth=1
+                                )
+
+                            fig.update_layout(
+                                title=dict(
+                                    text=f"<u><b>{company_name} ({selected_ticker})</b></u> (📊 {year_range} Year{'s' if year_range > 1 else ''} Trend) <br> {trend} ({pct_change:.2f}%)",
+                                    x=0.5,
+                                    xanchor="center"
+                                ),
+                                xaxis_title="Date",
+                                yaxis_title="Price",
+                                legend_title="Legend",
+                                height=500
                             )
 
-                            fig.add_annotation(
-                                text=f"🎯 Target Price ({year_used}): ${latest_target:.2f}",
-                                xref="paper", yref="paper",
-                                x=0, y=-0.01,
-                                showarrow=False,
-                                font=dict(color="limegreen", size=12),
-                                align="left",
-                                bgcolor="rgba(0,128,0,0.15)",
-                                bordercolor="green",
-                                borderwidth=1
-                            )
-
-                            # 🟪 Safe Zone 90% (Purple)
-                            fig.add_annotation(
-                                text=f"Safe: ${safe_zone_90:.2f}",
-                                xref="paper", yref="paper",
-                                x=0.6, y=-0.01,
-                                showarrow=False,
-                                font=dict(color="purple", size=12),
-                                align="left",
-                                bgcolor="rgba(128,0,128,0.15)",
-                                bordercolor="purple",
-                                borderwidth=1
-                            )
-
-                            # 🟥 Safe Zone 80% (Red)
-                            fig.add_annotation(
-                                text=f"Moderate: ${safe_zone_80:.2f}",
-                                xref="paper", yref="paper",
-                                x=1, y=-0.01,
-                                showarrow=False,
-                                font=dict(color="red", size=12),
-                                align="left",
-                                bgcolor="rgba(255,0,0,0.15)",
-                                bordercolor="red",
-                                borderwidth=1
-                            )
-
-                        fig.update_layout(
-                            title=dict(
-                                text=f"<u><b>{company_name} ({selected_ticker})</b></u> (📊 {year_range} Year{'s' if year_range > 1 else ''} Trend) <br> {trend} ({pct_change:.2f}%)",
-                                x=0.5,
-                                xanchor="center"
-                            ),
-                            xaxis_title="Date",
-                            yaxis_title="Price",
-                            legend_title="Legend",
-                            height=500
-                        )
-
-                        st.plotly_chart(fig, use_container_width=True)
+                            with metrics.span("render.chart"):
+                                st.plotly_chart(fig, use_container_width=True)
                         
-                        with st.container(border=True):
-                            st.markdown("##### 📊 Technical Summary")
-
                             with st.container(border=True):
-                                col1, col2 = st.columns(2)
-
-                                with col1:
-                                    st.markdown(f"**💰 Current Price:** ${current_price:.2f}")
-                                    st.markdown(f"**📈 Current Dividend Yield:** {div_yield:.2f}%")
-                                    currentdiv_payout = current_price * (div_yield / 100)
-                                    st.markdown(f"**📦 Current Dividend Payout:** ${currentdiv_payout:.2f}")
-
-                                with col2:
-                                    st.markdown(f"**📅 Low Date:** {low_date.strftime('%Y-%m-%d')}")
-                                    st.markdown(f"**📉 Yearly Low Price:** ${low_price:.2f}")
-                                    st.markdown(f"**📐 Historical Payout Yield:** {total_payout_yield * 100:.2f}%")
-                                    st.markdown(f"**📦 Yearly Low Payout:** ${total_payout:.2f}")
+                                st.markdown("##### 📊 Technical Summary")
+
+                                with st.container(border=True):
+                                    col1, col2 = st.columns(2)
+
+                                    with col1:
+                                        st.markdown(f"**💰 Current Price:** ${current_price:.2f}")
+                                        st.markdown(f"**📈 Current Dividend Yield:** {div_yield:.2f}%")
+                                        currentdiv_payout = current_price * (div_yield / 100)
+                                        st.markdown(f"**📦 Current Dividend Payout:** ${currentdiv_payout:.2f}")
+
+                                    with col2:
+                                        if has_window:
+                                            st.markdown(f"**📅 Low Date:** {low_date.strftime('%Y-%m-%d')}")
+                                            st.markdown(f"**📉 Yearly Low Price:** ${low_price:.2f}")
+                                            st.markdown(f"**📐 Historical Payout Yield:** {total_payout_yield * 100:.2f}%")
+                                            st.markdown(f"**📦 Yearly Low Payout:** ${total_payout:.2f}")
+                                        else:
+                                            st.caption(f"No {year_range}-year low available for {selected_ticker}.")
                                 
-                    else:
-                        st.warning(f"No historical data available for {selected_ticker}.")
-
-    toggle_yield = st.toggle("Activate Dividend Yield Deep Dive?", value=True)
-
-    # Deep Dive
-    if toggle_yield:
-        if not len(tickers) == 0:
-            def get_yield_analysis(ticker):
-                try:
-                    stock = yf.Ticker(ticker)
-                    info = stock.info
-                    current_price = info.get("currentPrice", 0)
-                    dividend_yield = info.get("dividendYield", 0) or 0
-                    current_payout = current_price * (dividend_yield / 100)
-
-                    # Historical dividend yield extremes
-                    dividends = stock.dividends
-                    prices = stock.history(period="max")["Close"]
-
-                    if dividends.empty or prices.empty:
-                        return None
-
-                    dividends.index = dividends.index.tz_convert(None) if dividends.index.tz else dividends.index
-                    prices.index = prices.index.tz_convert(None) if prices.index.tz else prices.index
-
-                    yield_data = []
-                    for date in dividends.index:
-                        price_on_date = prices.loc[prices.index.asof(date)] if date in prices.index else None
-                        if price_on_date:
-                            yield_pct = (dividends[date] / price_on_date) * 100
-                            yield_data.append((date, yield_pct, price_on_date))
-
-                    if not yield_data:
-                        return None
-
-                    high_yield = max(yield_data, key=lambda x: x[1])
-                    low_yield = min(yield_data, key=lambda x: x[1])
-
-                    debt_ratio = info.get("debtToEquity", None)
-
-                    return {
-                        "Ticker": ticker,
-                        "Name": info.get("shortName", "N/A"),
-                        "Current Price": f"${current_price:.2f}",
-                        "Current Dividend Yield (%)": f"{dividend_yield:.2f}%",
-                        "Current Dividend Payout": f"${current_payout:.3f}",
-                        "Debt Servicing Ratio": f"{debt_ratio:.2f}" if debt_ratio else "N/A",
-                        "High Yield (%)": f"{high_yield[1]:.2f}%",
-                        "High Yield Date": high_yield[0].date(),
-                        "High Yield Price": f"${high_yield[2]:.2f}",
-                        "Low Yield (%)": f"{low_yield[1]:.2f}%",
-                        "Low Yield Date": low_yield[0].date(),
-                        "Low Yield Price": f"${low_yield[2]:.2f}",
-                        "High - Current Yield (%)": f"{high_yield[1] - dividend_yield:.2f}%",
-                        "Low - Current Yield (%)": f"{low_yield[1] - dividend_yield:.2f}%"
-
-                    }
-                except Exception as e:
-                    messages.append(("error", f"❌ Error in yield analysis for {ticker}: {e}"))
-                    return None
-
-            st.markdown("##### 🧮 Dividend Yield Deep Dive")
-
-            yield_results = [get_yield_analysis(t) for t in tickers if t]
-            yield_results = [r for r in yield_results if r]
-
-            if yield_results:
-                yield_df = pd.DataFrame(yield_results)
-                st.dataframe(yield_df, hide_index=True)
-            else:
-                st.warning("No yield data available for selected tickers.")
\ No newline at end of file
+                        else:
+                            st.warning(f"No historical data available for {selected_ticker}.")
+
+        toggle_yield = st.toggle("Activate Dividend Yield Deep Dive?", value=True, key="toggle_yield")
+
+        # Deep Dive
+        if toggle_yield:
+            if not len(tickers) == 0:
+                st.markdown("##### 🧮 Dividend Yield Deep Dive")
+                deep_page_slot = st.empty()
+                live_slots["deep"] = st.empty()
+                deep_box = st.container()
+
+        # 🧪 Backtest
+        toggle_backtest = st.toggle("Activate Target-Price Backtest?", value=False, key="toggle_backtest")
+        if toggle_backtest and tickers:
+            st.markdown("##### 🧪 Target-Price Signal Backtest")
+            backtest_years = st.select_slider("Low window (years)", options=[1, 2, 3, 4, 5], value=5, key="backtest_years")
+            st.caption("The chart's buy rule on every trading day of the last 20 years: **Target** is at or below the "
+                       "dividend-yield target price, **Safe** / **Moderate** within the 90% / 80% zones above it. "
+                       "Returns include dividends; a hit is a positive forward return.")
+            backtest_box = st.container()
+
+        # 🔎 Query Panel
+        toggle_query = st.toggle("Activate Query Panel?", value=False, key="toggle_query")
+        if toggle_query and tickers:
+            st.markdown("##### 🔎 Query Screened Results")
+            query_box = st.container()
+
+        # 🌊 Finish the stream, then settle every section on the complete tables
+        if tickers:
+            pull()
+            live_slots["progress"].empty()
+            df = current_summary()
+            view = df if sort_by == "Input order" else universe.sort_table(df, sort_by, ascending=not descending)
+
+            # 📄 Only the visible page goes through the Styler
+            page = 1
+            if len(view) > styling.PAGE_SIZE:
+                pages = styling.page_count(view)
+                page = page_slot.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+
+            with metrics.span("render.summary_table"):
+                live_slots["summary"].dataframe(styling.style_table(styling.page_slice(view, page)), hide_index=True)
+
+            if messages:
+                with messages_box:
+                    st.markdown("---")
+                    for msg_type, msg_text in messages:
+                        if msg_type == "warning":
+                            st.warning(msg_text)
+                        elif msg_type == "error":
+                            st.error(msg_text)
+
+            if toggle_yield:
+                yield_df = current_deep()
+                if len(yield_df):
+                    deep_page = 1
+                    if len(yield_df) > styling.PAGE_SIZE:
+                        deep_pages = styling.page_count(yield_df)
+                        deep_page = deep_page_slot.number_input(f"Page (of {deep_pages})", min_value=1,
+                                                                max_value=deep_pages, value=1, step=1, key="deep_page")
+                    with metrics.span("render.deep_dive"):
+                        live_slots["deep"].dataframe(
+                            styling.style_deep_dive(styling.page_slice(yield_df, deep_page)), hide_index=True
+                        )
+
+                    with deep_box.expander("📈 Dividend Yield History"):
+                        # Snapshot rows skipped the stream, so their series come from the store here
+                        with metrics.span("compute.yield_history"):
+                            analysis.fill_yield_histories(yield_df["Ticker"], yield_histories)
+                        history_df = pd.DataFrame({t: yield_histories[t] for t in tickers if t in yield_histories})
+                        st.line_chart(history_df.sort_index().ffill(), y_label="Yield per payment (%)")
+                else:
+                    live_slots["deep"].warning("No yield data available for selected tickers.")
+
+            if toggle_backtest and len(df):
+                with metrics.span("compute.backtest"), backtest_box, st.spinner("Backtesting…"):
+                    zone_summary, ticker_stats = load_backtest(tuple(df["Ticker"]), backtest_years)
+                if len(zone_summary):
+                    backtest_box.dataframe(styling.style_backtest(zone_summary), hide_index=True)
+                    with backtest_box.expander("📋 Per-ticker results"):
+                        st.dataframe(ticker_stats.round(2), hide_index=True)
+                else:
+                    backtest_box.warning("No price history available to backtest.")
+
+            if toggle_query and len(df):
+                import query
+
+                with metrics.span("compute.query_index"):
+                    query_tables = {"Summary": (query.TableIndex(df), styling.style_table)}
+                    if toggle_yield and len(yield_df):
+                        query_tables["Deep Dive"] = (query.TableIndex(yield_df), styling.style_deep_dive)
+                with query_box:
+                    query_panel(query_tables)
+
+            # 💾 Downloads are built from the typed tables only when a button is clicked
+            export_tables = [("Summary", view)]
+            if toggle_yield and len(yield_df):
+                export_tables.append(("Deep Dive", yield_df))
+            can_excel = exports.excel_available()
+            for label, table in export_tables:
+                export_cols = export_box.columns(len(exports.FORMATS))
+                for col, (fmt, (ext, mime)) in zip(export_cols, exports.FORMATS.items()):
+                    col.download_button(
+                        f"⬇️ {label} ({fmt})",
+                        data=lambda table=table, fmt=fmt, label=label: exports.export(table, fmt, sheet_name=label),
+                        file_name=f"{label.lower().replace(' ', '_')}.{ext}",
+                        mime=mime,
+                        on_click="ignore",
+                        disabled=not len(table) or (fmt == "Excel" and not can_excel),
+                        help=None if fmt != "Excel" or can_excel else "Install XlsxWriter to export Excel.",
+                        key=f"export_{label}_{fmt}",
+                        width="stretch",
+                    )
+    finally:
+        # 🛠️ Rerun metrics (exported on every rerun, even one cut short by st.rerun(); shown to admins only)
+        rerun_record = metrics.finish_rerun(rerun_metrics)
+    if st.session_state.is_admin:
+        with st.expander("🛠️ Rerun metrics"):
+            st.markdown(f"**⏱️ Rerun:** {rerun_record['rerun_ms']:.0f} ms · "
+                        f"**Watchlist:** {rerun_record['watchlist']} ({rerun_record['tickers']} tickers)")
+            spans_df = pd.DataFrame.from_dict(rerun_record["spans"], orient="index")
+            if not spans_df.empty:
+                st.dataframe(spans_df.rename_axis("Stage").sort_values("total_ms", ascending=False))
+            counters_df = pd.Series(rerun_record["counters"], name="Value").rename_axis("Counter").to_frame()
+            if not counters_df.empty:
+                st.dataframe(counters_df)
+            st.caption(f"Logged to {os.path.join(metrics.METRICS_DIR, metrics.RERUN_LOG)}; "
+                       f"Prometheus text at {metrics.prometheus_path()}")
@@ -0,0 +1,119 @@
+"""Styler pipelines for the summary, deep-dive, backtest, monitor and rollup tables.
+
+Cell colours are worked out for the whole frame in one array pass
+(`Styler.apply(axis=None)`) rather than one Python call per cell. Only the
+visible page is styled, so render cost stays flat as the universe grows.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+GREEN = "color: white; background-color: #006400"  # dark green
+MAROON = "color: white; background-color: #800000"  # dark maroon
+
+PAGE_SIZE = 100
+
+NUMBER_FORMATS = {
+    "Current Price": "{:.2f}",
+    "5Y Low Price": "{:.2f}",
+    "5Y Dividend Payout": "{:.2f}",
+    "Target Price (Actual)": "{:.2f}",
+    "Trailing EPS": "{:.2f}",
+    "Forward EPS": "{:.2f}",
+    "PE Ratio": "{:.2f}",
+    "PEG Ratio": "{:.2f}",
+    "Dividend Yield (%)": "{:.2f}%",
+    "5Y Dividend Yield (%)": "{:.2f}%",
+    "Price Zone (%)": "{:.2f}%",
+    "5Y Low Date": "{:%Y-%m-%d}",
+}
+
+DEEP_DIVE_FORMATS = {
+    "Current Price": "${:.2f}",
+    "Current Dividend Yield (%)": "{:.2f}%",
+    "Current Dividend Payout": "${:.3f}",
+    "Debt Servicing Ratio": "{:.2f}",
+    "High Yield (%)": "{:.2f}%",
+    "High Yield Date": "{:%Y-%m-%d}",
+    "High Yield Price": "${:.2f}",
+    "Low Yield (%)": "{:.2f}%",
+    "Low Yield Date": "{:%Y-%m-%d}",
+    "Low Yield Price": "${:.2f}",
+    "High - Current Yield (%)": "{:.2f}%",
+    "Low - Current Yield (%)": "{:.2f}%",
+}
+
+
+BACKTEST_FORMATS = {
+    "Signals": "{:,}",
+    "Hit Rate (%)": "{:.1f}%",
+    "Avg Return (%)": "{:+.2f}%",
+}
+
+MONITOR_FORMATS = {
+    "Price": "{:.2f}",
+    "Target Price": "{:.2f}",
+    "Safe Zone 90": "{:.2f}",
+    "Safe Zone 80": "{:.2f}",
+    "vs Target (%)": "{:+.2f}%",
+}
+
+
+def highlight_styles(df):
+    """CSS for every cell: price vs target on Current Price, label colour on Sentiment."""
+    styles = pd.DataFrame("", index=df.index, columns=df.columns)
+
+    if "Current Price" in df.columns and "Target Price (Actual)" in df.columns:
+        price = pd.to_numeric(df["Current Price"], errors="coerce").to_numpy(dtype=float)
+        target = pd.to_numeric(df["Target Price (Actual)"], errors="coerce").to_numpy(dtype=float)
+        has_target = ~np.isnan(target) & (target != 0)
+        styles["Current Price"] = np.where(has_target, np.where(price >= target, MAROON, GREEN), "")
+
+    if "Sentiment" in df.columns:
+        label = df["Sentiment"].astype(str).str.strip().to_numpy()
+        styles["Sentiment"] = np.select([label == "Bullish", label == "Bearish"], [GREEN, MAROON], "")
+
+    return styles
+
+
+def style_table(df):
+    formats = {col: fmt for col, fmt in NUMBER_FORMATS.items() if col in df.columns}
+    return df.style.format(formats, na_rep="").apply(highlight_styles, axis=None)
+
+
+def style_deep_dive(df):
+    formats = {col: fmt for col, fmt in DEEP_DIVE_FORMATS.items() if col in df.columns}
+    return df.style.format(formats, na_rep="N/A")
+
+
+def style_backtest(df):
+    formats = {col: fmt for col, fmt in BACKTEST_FORMATS.items() if col in df.columns}
+    return df.style.format(formats, na_rep="N/A")
+
+
+def _zone_styles(df):
+    styles = pd.DataFrame("", index=df.index, columns=df.columns)
+    zone = df["Zone"].astype(str).to_numpy()
+    styles["Zone"] = np.select([zone == "Target", zone == "Overvalued"], [GREEN, MAROON], "")
+    return styles
+
+
+def style_monitor(df):
+    formats = {col: fmt for col, fmt in MONITOR_FORMATS.items() if col in df.columns}
+    return df.style.format(formats, na_rep="N/A").apply(_zone_styles, axis=None)
+
+
+def style_rollup(df):
+    formats = {col: "{:.2f}" for col in df.columns if col.startswith("Median ")}
+    return df.style.format(formats, na_rep="N/A")
+
+
+def page_count(df, page_size=PAGE_SIZE):
+    return max(1, math.ceil(len(df) / page_size))
+
+
+def page_slice(df, page, page_size=PAGE_SIZE):
+    """Rows for a 1-based page number."""
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
@@ -0,0 +1,263 @@
+"""Local symbol master: instant ticker validation, normalisation and lookup.
+
+The listing (`listings/symbols.csv`: Symbol, Name, Exchange) is loaded once
+per process into sorted NumPy string arrays. Symbol-prefix searches are
+binary searches over the symbols and company-name lookups go through a
+sorted array of name words; exact checks are a dict lookup. Nothing here
+touches the network at check time, so malformed input (and, for a market
+the listing covers in full, a typo or delisted symbol) is rejected before
+any Yahoo call.
+
+Rebuild the listing from the exchanges' published files:
+
+    python symbols.py --download --sgx sgx_securities.csv
+    python symbols.py --nasdaq nasdaqlisted.txt --other otherlisted.txt --sgx sgx_securities.csv
+
+The markets a build covered in full are written next to the listing
+(`symbols.csv.markets`); strict checks apply to those markets only.
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import tempfile
+import threading
+import urllib.request
+
+import numpy as np
+
+LISTINGS_PATH = os.environ.get(
+    "SYMBOL_LISTINGS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "listings", "symbols.csv"),
+)
+# Rejects well-formed tickers missing from the listing, in the markets it covers in full
+STRICT = os.environ.get("SYMBOLS_STRICT", "1") == "1"
+SUGGESTIONS = 8
+SGX_SUFFIX = ".SI"
+NASDAQ_TRADER = "https://www.nasdaqtrader.com/dynamic/SymDir/"
+_SYNTAX = re.compile(r"^[A-Z0-9\-\.]+$")
+_US_SYNTAX = re.compile(r"^[A-Z]+(?:-[A-Z]+)?$")  # NYSE/NASDAQ symbols never carry digits
+_WORD = re.compile(r"[A-Z0-9&']+")
+_END = "\uffff"  # sorts after every character we store, so [prefix, prefix + _END) is a prefix range
+
+# 🏛️ otherlisted.txt exchange codes
+OTHER_EXCHANGES = {"A": "NYSE American", "N": "NYSE", "P": "NYSE Arca", "Z": "Cboe BZX", "V": "IEX"}
+
+
+def market(symbol):
+    """"SGX", "US" or None (another exchange suffix) for a normalised symbol."""
+    if symbol.endswith(SGX_SUFFIX):
+        return "SGX"
+    return "US" if _US_SYNTAX.match(symbol) else None
+
+
+def markets_path(path):
+    return f"{path}.markets"
+
+
+def _prefix_range(sorted_values, prefix):
+    lo = np.searchsorted(sorted_values, prefix, side="left")
+    hi = np.searchsorted(sorted_values, prefix + _END, side="left")
+    return lo, hi
+
+
+class SymbolIndex:
+    def __init__(self, rows, complete=()):
+        self.complete = frozenset(complete)  # markets listed in full, so absence means unlisted
+        rows = sorted({symbol.upper(): (symbol.upper(), name, exchange) for symbol, name, exchange in rows}.values())
+        self.symbols = np.array([r[0] for r in rows], dtype=str)
+        self._rows = {r[0]: i for i, r in enumerate(rows)}  # exact checks skip the binary search
+        self.names = [r[1] for r in rows]
+        self.exchanges = [r[2] for r in rows]
+        words = sorted((word, i) for i, name in enumerate(self.names) for word in set(_WORD.findall(name.upper())))
+        self._words = np.array([w for w, _ in words], dtype=str)
+        self._word_rows = np.array([i for _, i in words], dtype=np.int32)
+
+    @classmethod
+    def load(cls, path=LISTINGS_PATH):
+        complete = ()
+        if os.path.exists(markets_path(path)):
+            with open(markets_path(path), encoding="utf-8") as fh:
+                complete = [line.strip() for line in fh if line.strip()]
+        with open(path, newline="", encoding="utf-8") as fh:
+            return cls(((row["Symbol"].strip(), row["Name"].strip(), row["Exchange"].strip())
+                        for row in csv.DictReader(fh) if row["Symbol"].strip()), complete)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._rows
+
+    def lookup(self, symbol):
+        """(symbol, name, exchange) for a listed symbol, or None."""
+        i = self._rows.get(symbol)
+        return (symbol, self.names[i], self.exchanges[i]) if i is not None else None
+
+    def normalize(self, raw):
+        """Canonical Yahoo symbol for `raw` ("d05.si" -> "D05.SI", bare "D05" -> "D05.SI"), or None if malformed.
+
+        A bare symbol only gains ".SI" when it cannot be a US one: it has
+        digits, or the listing covers the US in full and does not have it.
+        """
+        symbol = raw.strip().upper()
+        if not _SYNTAX.match(symbol):
+            return None
+        if symbol not in self and "." not in symbol and symbol + SGX_SUFFIX in self:
+            if market(symbol) != "US" or "US" in self.complete:
+                return symbol + SGX_SUFFIX
+        return symbol
+
+    def _symbol_prefix(self, text, limit):
+        lo, hi = _prefix_range(self.symbols, text)
+        return list(range(lo, min(hi, lo + limit)))
+
+    def search(self, text, limit=SUGGESTIONS):
+        """Listed (symbol, name) pairs whose symbol or a name word starts with `text`, symbols first."""
+        text = text.strip().upper()
+        if not text:
+            return []
+        rows = self._symbol_prefix(text, limit)
+        if len(rows) < limit:
+            lo, hi = _prefix_range(self._words, text)
+            for i in self._word_rows[lo:hi]:
+                if i not in rows:
+                    rows.append(int(i))
+                    if len(rows) == limit:
+                        break
+        return [(str(self.symbols[i]), self.names[i]) for i in rows]
+
+    def suggest(self, symbol, limit=3):
+        """Listed symbols sharing the longest prefix with `symbol` (for "did you mean")."""
+        for n in range(len(symbol) - 1, 0, -1):
+            rows = self._symbol_prefix(symbol[:n], limit)
+            if rows:
+                return [str(self.symbols[i]) for i in rows]
+        return []
+
+    def check(self, tickers, strict=STRICT):
+        """Normalised, de-duplicated tickers in input order, (raw, reason) for each rejected one,
+        and (raw, symbol) for each one read as a different symbol (bare "D05" -> "D05.SI")."""
+        valid, rejected, rewritten = [], [], []
+        for raw in tickers:
+            if not raw.strip():
+                continue
+            symbol = self.normalize(raw)
+            if symbol is None:
+                rejected.append((raw, f"{raw} is not a ticker symbol"))
+            elif strict and symbol not in self and market(symbol) in self.complete:
+                hint = self.suggest(symbol)
+                rejected.append((raw, f"{raw} is not listed" + (f" (did you mean {', '.join(hint)}?)" if hint else "")))
+            elif symbol not in valid:
+                valid.append(symbol)
+                if symbol != raw.strip().upper():
+                    rewritten.append((raw, symbol))
+        return valid, rejected, rewritten
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_index():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = SymbolIndex.load()
+        return _default
+
+
+# 🔄 Rebuilding the listing from exchange files
+def read_nasdaq_trader(path, exchange=None):
+    """(symbol, name, exchange) from NASDAQ Trader's pipe-delimited nasdaqlisted.txt / otherlisted.txt."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        rows = list(csv.DictReader(fh, delimiter="|"))
+    out = []
+    for row in rows:
+        symbol = (row.get("Symbol") or row.get("ACT Symbol") or "").strip()
+        if not symbol or symbol.startswith("File Creation Time") or row.get("Test Issue") == "Y":
+            continue
+        if "$" in symbol or "=" in symbol:  # preferreds and units have no Yahoo quote we screen
+            continue
+        where = exchange or OTHER_EXCHANGES.get(row.get("Exchange", ""), row.get("Exchange", ""))
+        out.append((symbol.replace(".", "-"), row.get("Security Name", "").strip(), where))
+    return out
+
+
+def read_sgx(path):
+    """(symbol, name, "SGX") from an SGX securities CSV with a code and a name column."""
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        rows = csv.DictReader(fh)
+        header = {h.strip().lower(): h for h in rows.fieldnames or []}
+        code = next((header[h] for h in ("trading code", "code", "stock code", "symbol", "ticker") if h in header), None)
+        name = next((header[h] for h in ("trading name", "security name", "company name", "name") if h in header), None)
+        if code is None:
+            raise ValueError(f"No code column in {path}: {rows.fieldnames}")
+        out = []
+        for row in rows:
+            symbol = row[code].strip().upper()
+            if symbol:
+                suffixed = symbol if symbol.endswith(SGX_SUFFIX) else symbol + SGX_SUFFIX
+                out.append((suffixed, row[name].strip() if name else "", "SGX"))
+        return out
+
+
+def download_nasdaq_trader(out_dir):
+    """Fetch nasdaqlisted.txt and otherlisted.txt (every NASDAQ, NYSE and other US listing) into `out_dir`."""
+    paths = []
+    for name in ("nasdaqlisted.txt", "otherlisted.txt"):
+        path = os.path.join(out_dir, name)
+        with urllib.request.urlopen(NASDAQ_TRADER + name, timeout=30) as resp, open(path, "wb") as fh:
+            fh.write(resp.read())
+        paths.append(path)
+    return paths
+
+
+def write_listing(rows, path=LISTINGS_PATH, complete=()):
+    rows = sorted({symbol: (symbol, name, exchange) for symbol, name, exchange in rows}.values())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["Symbol", "Name", "Exchange"])
+        writer.writerows(rows)
+    with open(f"{markets_path(path)}.tmp", "w", encoding="utf-8") as fh:
+        fh.writelines(f"{m}\n" for m in sorted(complete))
+    os.replace(tmp, path)
+    os.replace(f"{markets_path(path)}.tmp", markets_path(path))
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the local symbol listing from exchange files.")
+    parser.add_argument("--download", action="store_true",
+                        help="fetch nasdaqlisted.txt and otherlisted.txt from NASDAQ Trader")
+    parser.add_argument("--nasdaq", help="NASDAQ Trader nasdaqlisted.txt")
+    parser.add_argument("--other", help="NASDAQ Trader otherlisted.txt (NYSE, NYSE Arca, ...)")
+    parser.add_argument("--sgx", help="SGX securities CSV")
+    parser.add_argument("--out", default=LISTINGS_PATH, help="listing to write")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.TemporaryDirectory()
+    if args.download:
+        args.nasdaq, args.other = download_nasdaq_trader(workdir.name)
+    rows, complete = [], []
+    if args.nasdaq:
+        rows += read_nasdaq_trader(args.nasdaq, exchange="NASDAQ")
+    if args.other:
+        rows += read_nasdaq_trader(args.other)
+    if args.nasdaq and args.other:
+        complete.append("US")  # the two files together are every US listing
+    if args.sgx:
+        rows += read_sgx(args.sgx)
+        complete.append("SGX")
+    workdir.cleanup()
+    if not rows:
+        parser.error("give at least one of --download, --nasdaq, --other, --sgx")
+    print(f"Wrote {write_listing(rows, args.out, complete)} symbols to {args.out}"
+          f" (strict checks for: {', '.join(complete) or 'none'})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Dividend-yield target prices for every year window and every ticker at once.
+
+The chart's 1-5 year buttons all ask the same question over windows that
+share an end date, so one reverse running-minimum over the close panel
+answers every window's low, and one cumulative sum over all dividend events
+answers every trailing payout. Switching the year range is then a lookup.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import market_data
+
+YEAR_WINDOWS = (1, 2, 3, 4, 5)
+PAYOUT_DAYS = 366
+# Where a price sits against the chart's lines: at/below target, then the 90% and 80% safe zones above it
+ZONES = ("Target", "Safe", "Moderate", "Overvalued")
+ZONE_LIMITS = (1.0, 1 / 0.9, 1 / 0.8)  # price / target at the top of each zone but the last
+_KEY_SPAN = 10 ** 6  # > any day number we will see, so (ticker, day) packs into one int64
+
+
+def _suffix_min(values):
+    """Running min of values[i:] for every i, with the row it came from (earliest on ties)."""
+    rows = len(values)
+    rev = np.where(np.isnan(values), np.inf, values)[::-1]
+    run = np.minimum.accumulate(rev, axis=0)
+    at = np.where(rev <= run, np.arange(rows)[:, None], -1)
+    pos = np.maximum.accumulate(at, axis=0)
+    return run[::-1], (rows - 1 - pos)[::-1]
+
+
+def _day_numbers(timestamps):
+    return np.asarray(timestamps, dtype="datetime64[D]").astype(np.int64)
+
+
+def dividend_index(dividends, tickers):
+    """All dividend events packed into sorted (ticker, day) keys with running sums."""
+    keys, amounts = [], []
+    for code, ticker in enumerate(tickers):
+        series = dividends.get(ticker)
+        if series is None or series.empty:
+            continue
+        series = series.sort_index()
+        keys.append(code * _KEY_SPAN + _day_numbers(series.index.values))
+        amounts.append(series.to_numpy(dtype=float))
+    if not keys:
+        return np.zeros(0, dtype=np.int64), np.zeros(1)
+    return np.concatenate(keys), np.concatenate([[0.0], np.cumsum(np.concatenate(amounts))])
+
+
+def trailing_dividends(index, at, days=PAYOUT_DAYS):
+    """Each ticker's dividends paid in [at - days, at]; `at` holds one date per ticker."""
+    keys, sums = index
+    at = np.asarray(at, dtype="datetime64[ns]")
+    valid = ~np.isnat(at)
+    day = np.where(valid, _day_numbers(np.where(valid, at, np.datetime64(0, "ns"))), 0)
+    base = np.arange(len(at)) * _KEY_SPAN
+    hi = np.searchsorted(keys, base + day, side="right")
+    lo = np.searchsorted(keys, base + day - days, side="left")
+    return np.where(valid, sums[hi] - sums[lo], np.nan)
+
+
+def window_targets(closes, dividends, current_prices, dividend_yields, years=YEAR_WINDOWS, end=None):
+    """Low, payout, target and safe zones per (ticker, years).
+
+    `closes` is a dates x tickers frame, `dividends` maps ticker -> Series,
+    and `current_prices` / `dividend_yields` are aligned with `closes.columns`.
+    """
+    closes = closes.sort_index()
+    tickers = list(closes.columns)
+    end = pd.Timestamp(end if end is not None else datetime.today())
+    dates = closes.index.values
+    low_run, low_row = _suffix_min(closes.to_numpy(dtype=float))
+    price = np.asarray(current_prices, dtype=float)
+    div_yield = np.nan_to_num(np.asarray(dividend_yields, dtype=float))
+    payouts = dividend_index(dividends, tickers)
+
+    frames = []
+    for yr in years:
+        start = np.searchsorted(dates, np.datetime64(end - timedelta(days=365 * yr)), side="left")
+        if start >= len(dates):
+            low = np.full(len(tickers), np.nan)
+            low_date = np.full(len(tickers), np.datetime64("NaT"), dtype="datetime64[ns]")
+        else:
+            low = np.where(np.isinf(low_run[start]), np.nan, low_run[start])
+            low_date = np.where(np.isnan(low), np.datetime64("NaT"), dates[low_row[start]])
+
+        payout = trailing_dividends(payouts, low_date)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            payout_yield = payout / low
+            current_payout = price * div_yield / 100
+            ok = (div_yield > 0) & (payout_yield > 0)
+            target = np.where(ok, current_payout / payout_yield, 0.0)
+            safe_90 = np.where(ok, current_payout / (payout_yield * 0.9), 0.0)
+            safe_80 = np.where(ok, current_payout / (payout_yield * 0.8), 0.0)
+
+        frames.append(pd.DataFrame({
+            "Ticker": tickers,
+            "Years": yr,
+            "Low Price": low,
+            "Low Date": pd.to_datetime(low_date),
+            "Payout": payout,
+            "Payout Yield": payout_yield,
+            "Target Price": target,
+            "Safe Zone 90": safe_90,
+            "Safe Zone 80": safe_80,
+        }))
+    return pd.concat(frames, ignore_index=True).set_index(["Ticker", "Years"]).sort_index()
+
+
+def load_window_targets(tickers, years=YEAR_WINDOWS):
+    """`window_targets` for cached tickers, with price and yield from `info`."""
+    end = datetime.today()
+    start = end - timedelta(days=365 * max(years))
+    tickers = list(dict.fromkeys(tickers))
+    if len(tickers) > 1:
+        market_data.default_cache().prefetch(tickers)  # stale series share bulk downloads, not one call each
+    closes, dividends, prices, yields = {}, {}, [], []
+    for ticker in tickers:
+        stock = market_data.Ticker(ticker)
+        close = stock.closes(start=start, end=end)
+        if close.empty:
+            continue
+        closes[ticker] = close
+        dividends[ticker] = stock.dividend_series()
+        prices.append(stock.info.get("currentPrice", np.nan))
+        yields.append(stock.info.get("dividendYield", 0) or 0)
+    if not closes:
+        return pd.DataFrame()
+    return window_targets(pd.DataFrame(closes), dividends, prices, yields, years=years, end=end)
@@ -0,0 +1,102 @@
+"""Typed columnar tables for a screened universe.
+
+Per-ticker workers still hand back one small dict each, but those are
+transposed straight into typed columns: float32 numbers, categorical
+sectors and sentiment labels, Arrow-backed strings and real dates. Nothing
+is pre-formatted, so tables sort and filter on their values and formatting
+happens only when a page is displayed (see `styling`).
+"""
+import numpy as np
+import pandas as pd
+
+FLOAT = "float32"
+CATEGORY = "category"
+STRING = "string"
+DATE = "datetime64[ns]"
+
+SUMMARY_SCHEMA = {
+    "Ticker": STRING,
+    "Name": STRING,
+    "Sector": CATEGORY,
+    "Industry": CATEGORY,
+    "Current Price": FLOAT,
+    "Sentiment": CATEGORY,
+    "Sentiment Trend": CATEGORY,
+    "Trailing EPS": FLOAT,
+    "Forward EPS": FLOAT,
+    "Dividend Yield (%)": FLOAT,
+    "5Y Low Date": DATE,
+    "5Y Low Price": FLOAT,
+    "5Y Dividend Payout": FLOAT,
+    "5Y Dividend Yield (%)": FLOAT,
+    "PE Ratio": FLOAT,
+    "PEG Ratio": FLOAT,
+    "Price Zone (%)": FLOAT,
+    "Target Price (Actual)": FLOAT,
+}
+
+DEEP_DIVE_SCHEMA = {
+    "Ticker": STRING,
+    "Name": STRING,
+    "Current Price": FLOAT,
+    "Current Dividend Yield (%)": FLOAT,
+    "Current Dividend Payout": FLOAT,
+    "Debt Servicing Ratio": FLOAT,
+    "High Yield (%)": FLOAT,
+    "High Yield Date": DATE,
+    "High Yield Price": FLOAT,
+    "Low Yield (%)": FLOAT,
+    "Low Yield Date": DATE,
+    "Low Yield Price": FLOAT,
+    "High - Current Yield (%)": FLOAT,
+    "Low - Current Yield (%)": FLOAT,
+}
+
+
+def _column(values, dtype):
+    if isinstance(values, pd.Series) and values.dtype == dtype:
+        return values.to_numpy() if dtype in (FLOAT, DATE) else values.array
+    if dtype == FLOAT:
+        # Strings (e.g. "$1.23" in an old snapshot) raise ValueError here; None becomes NaN.
+        return np.asarray(values, dtype=np.float32)
+    if dtype == DATE:
+        return pd.to_datetime(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=DATE)
+    if dtype == CATEGORY:
+        return pd.Categorical(np.asarray(values, dtype=object))
+    return pd.array(np.asarray(values, dtype=object), dtype=STRING)
+
+
+def from_rows(rows, schema):
+    """Typed table from per-ticker row dicts; keys outside `schema` are dropped."""
+    rows = [row for row in rows if row]
+    return pd.DataFrame({col: _column([row.get(col) for row in rows], dtype) for col, dtype in schema.items()})
+
+
+def conform(frame, schema):
+    """`frame` cast to `schema` (missing columns filled with NA); ValueError if a column won't cast."""
+    return pd.DataFrame(
+        {
+            col: _column(frame[col] if col in frame.columns else [None] * len(frame), dtype)
+            for col, dtype in schema.items()
+        },
+        index=pd.RangeIndex(len(frame)),
+    )
+
+
+def in_order(tickers, schema, *frames):
+    """Rows from several tables merged into `tickers` order; earlier tables win."""
+    frames = [f for f in frames if f is not None and len(f)]
+    if not frames:
+        return from_rows([], schema)
+    merged = pd.concat(frames, ignore_index=True).drop_duplicates("Ticker")
+    order = {t: i for i, t in enumerate(dict.fromkeys(tickers))}
+    merged = merged.assign(_pos=merged["Ticker"].map(order)).dropna(subset=["_pos"]).sort_values("_pos", kind="stable")
+    # concat drops categoricals whose categories differ between tables, so re-type
+    return conform(merged, schema)
+
+
+def sort_table(frame, column, ascending=True):
+    """Whole-table sort (missing values last), done before paging."""
+    if column not in frame.columns:
+        return frame
+    return frame.sort_values(column, ascending=ascending, na_position="last", kind="stable", ignore_index=True)
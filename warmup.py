@@ -0,0 +1,172 @@
+"""Background refresh of the preset watchlists.
+
+Each preset's summary and deep-dive tables are screened on an interval and
+written as snapshots under SNAPSHOT_DIR/presets/<preset>, so a preset click
+is served warm. Tickers whose market is closed keep their last rows instead
+of being re-fetched, and extra runs are scheduled just after each SGX/US
+open and close. Runs inside the app (started after login by
+`streamlit_app.start_preset_warmup`) or as a sidecar:
+
+    python warmup.py            # loop forever
+    python warmup.py --once     # single pass
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from zoneinfo import ZoneInfo
+
+import analysis
+import universe
+from concurrency import MessageLog
+from presets import PRESETS
+
+WARMUP_DIR = os.path.join(analysis.SNAPSHOT_DIR, "presets")
+WARMUP_INTERVAL = int(os.environ.get("WARMUP_INTERVAL", 10 * 60))
+STATUS_FILE = "status.json"
+
+# 🕘 Regular sessions, exchange-local time. Quotes keep settling for a while
+# after the bell, so a market counts as live until CLOSE_SLACK past close.
+MARKETS = {
+    "SGX": {"tz": "Asia/Singapore", "open": dtime(9, 0), "close": dtime(17, 0)},
+    "US": {"tz": "America/New_York", "open": dtime(9, 30), "close": dtime(16, 0)},
+}
+OPEN_SLACK = timedelta(minutes=5)
+CLOSE_SLACK = timedelta(minutes=30)
+
+
+def market_for(ticker):
+    return "SGX" if ticker.upper().endswith(".SI") else "US"
+
+
+def _session(market, day):
+    spec = MARKETS[market]
+    tz = ZoneInfo(spec["tz"])
+    return (
+        datetime.combine(day, spec["open"], tzinfo=tz),
+        datetime.combine(day, spec["close"], tzinfo=tz),
+    )
+
+
+def is_live(market, now=None):
+    now = now or datetime.now(ZoneInfo("UTC"))
+    local = now.astimezone(ZoneInfo(MARKETS[market]["tz"]))
+    if local.weekday() >= 5:
+        return False
+    opens, closes = _session(market, local.date())
+    return opens - OPEN_SLACK <= local <= closes + CLOSE_SLACK
+
+
+def next_boundary(now=None):
+    """Next moment just after any market opens or closes."""
+    now = now or datetime.now(ZoneInfo("UTC"))
+    candidates = []
+    for market, spec in MARKETS.items():
+        local = now.astimezone(ZoneInfo(spec["tz"]))
+        for offset in range(0, 4):
+            day = local.date() + timedelta(days=offset)
+            if day.weekday() >= 5:
+                continue
+            opens, closes = _session(market, day)
+            candidates += [t for t in (opens + OPEN_SLACK, closes + timedelta(minutes=10)) if t > now]
+    return min(candidates)
+
+
+def preset_dir(name):
+    return os.path.join(WARMUP_DIR, re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_"))
+
+
+def read_status():
+    try:
+        with open(os.path.join(WARMUP_DIR, STATUS_FILE), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_status(status):
+    os.makedirs(WARMUP_DIR, exist_ok=True)
+    path = os.path.join(WARMUP_DIR, STATUS_FILE)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(status, fh, indent=2)
+    os.replace(tmp, path)
+
+
+def refresh_preset(name, tickers, now=None, force=False):
+    """Re-screen a preset's live-market tickers and rewrite its snapshot."""
+    tickers = [t.upper() for t in tickers]
+    out_dir = preset_dir(name)
+    previous = analysis.load_snapshot(out_dir, max_age=float("inf"))
+    previous_summary, previous_deep = previous if previous else (None, None)
+    have = set(previous_summary["Ticker"]) if previous else set()
+
+    # A ticker with no rows yet is always screened, live market or not.
+    due = [t for t in tickers if force or t not in have or is_live(market_for(t), now)]
+    messages = MessageLog()
+    summary = analysis.screen(due, messages)
+    deep = analysis.deep_dive(due, messages)
+
+    analysis.write_snapshot(
+        universe.in_order(tickers, universe.SUMMARY_SCHEMA, summary, previous_summary),
+        universe.in_order(tickers, universe.DEEP_DIVE_SCHEMA, deep, previous_deep),
+        out_dir,
+    )
+    return {
+        "refreshed_at": time.time(),
+        "refreshed": len(due),
+        "skipped": len(tickers) - len(due),
+        "errors": sum(1 for msg_type, _ in messages if msg_type == "error"),
+    }
+
+
+def refresh_all(presets=PRESETS, now=None, force=False):
+    status = read_status()
+    for name, tickers in presets.items():
+        try:
+            status[name] = refresh_preset(name, tickers, now=now, force=force)
+        except Exception as e:
+            status.setdefault(name, {})["last_error"] = str(e)
+    _write_status(status)
+    return status
+
+
+def _recently_refreshed(interval):
+    # Several app workers (or a sidecar) may share one snapshot directory;
+    # whoever refreshed last covers everyone.
+    refreshed = [s.get("refreshed_at", 0) for s in read_status().values()]
+    return bool(refreshed) and time.time() - min(refreshed) < interval * 0.9
+
+
+def run_forever(presets=PRESETS, interval=WARMUP_INTERVAL, stop=None):
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        if not _recently_refreshed(interval):
+            refresh_all(presets)
+        now = datetime.now(ZoneInfo("UTC"))
+        wake = min(now + timedelta(seconds=interval), next_boundary(now))
+        stop.wait(max((wake - now).total_seconds(), 1))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep preset watchlist snapshots warm.")
+    parser.add_argument("--once", action="store_true", help="refresh every preset once and exit")
+    parser.add_argument("--force", action="store_true", help="also refresh tickers whose market is closed")
+    parser.add_argument("--interval", type=int, default=WARMUP_INTERVAL, help="seconds between passes")
+    args = parser.parse_args(argv)
+
+    if args.once:
+        for name, entry in refresh_all(force=args.force).items():
+            print(f"{name}: {entry}")
+        return 0
+    run_forever(interval=args.interval)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())